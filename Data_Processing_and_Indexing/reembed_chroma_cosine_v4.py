@@ -79,15 +79,21 @@ def main():
         texts.append(txt)
         ids.append(f"fb-v4c-{i:04d}")
 
-    # batch encode with normalization
-    import math
-    embeddings: List[List[float]] = []
+    # batch encode with normalization.
+    # One encode() call over the full corpus: sentence-transformers sorts the
+    # inputs by length internally ("smart batching"), so padding waste is
+    # minimized only when it sees the whole list — the old outer 128-chunk loop
+    # defeated that. batch_size stays a knob via --batch.
     B = args.batch
-    for s in range(0, len(texts), B):
-        e = min(s+B, len(texts))
-        vecs = model.encode(texts[s:e], batch_size=min(64, B), normalize_embeddings=True, convert_to_numpy=True)
-        embeddings.extend(v.tolist() for v in vecs)
-        print(f"[EMB] {e-s} -> total {e}")
+    vecs = model.encode(
+        texts,
+        batch_size=B,
+        normalize_embeddings=True,
+        convert_to_numpy=True,
+        show_progress_bar=True,
+    )
+    embeddings: List[List[float]] = [v.tolist() for v in vecs]
+    print(f"[EMB] encoded {len(embeddings)} chunks")
 
     # --- write to Chroma with cosine space
     try:
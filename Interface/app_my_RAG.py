@@ -333,7 +333,9 @@ if APP_ENV == "DEV":
                                 st.write(gen_result["final_output"])
 
                                 st.markdown("**Developer Output**")
-                                st.json({"refs": refs, "llm_debug": gen_result.get("developer_output")})
+                                from dataclasses import asdict as _asdict
+                                st.json({"refs": [_asdict(r) for r in refs],
+                                         "llm_debug": gen_result.get("developer_output")})
                             except Exception as e:
                                 st.exception(e)
 
@@ -12,6 +12,7 @@ from typing import List, Dict, Tuple, Any
 
 from rank_bm25 import BM25Okapi
 import chromadb
+import torch
 from sentence_transformers import SentenceTransformer
 
 # ------------------ Config ------------------
@@ -74,11 +75,14 @@ def rrf_fuse(ranked_lists: List[List[str]], k: int = 60) -> List[Tuple[str, floa
 
 # ------------------ Main ------------------
 def main() -> None:
+    # ---- CPU inference tuning: all cores intra-op, no gradient tracking ----
+    torch.set_num_threads(os.cpu_count() or 8)
+    torch.set_num_interop_threads(1)
+
     # ---- Load JSON & build BM25 ----
     print(f"[JSON] {JSON_PATH}")
     data = load_chunks(JSON_PATH)
     docs = [d["text"] for d in data]
-    metas = {d["id"]: {"chapter": d.get("chapter"), "order": d.get("order"), "tokens": d.get("tokens")} for d in data}
     bm25 = BM25Okapi([tokenize(d) for d in docs])
 
     # ---- Dense (Chroma) client/collection ----
@@ -88,6 +92,9 @@ def main() -> None:
 
     # ---- Embedder ----
     embedder = SentenceTransformer(EMBED_MODEL)
+    embedder.eval()
+    if torch.cuda.is_available():
+        embedder.half()
 
     # ---- BM25 ranking (ids) ----
     bm25_scores = bm25.get_scores(tokenize(TEST_QUERY))
@@ -95,24 +102,35 @@ def main() -> None:
     bm25_ids = [data[i]["id"] for i in bm25_indices]
 
     # ---- Dense ranking (ids) ----
-    q_emb = embedder.encode([TEST_QUERY], convert_to_tensor=False)
-    dense = collection.query(query_embeddings=q_emb, n_results=DENSE_TOPK)
+    with torch.inference_mode():
+        q_emb = embedder.encode([TEST_QUERY], convert_to_tensor=False)
+    dense = collection.query(
+        query_embeddings=q_emb,
+        n_results=DENSE_TOPK,
+        include=["documents", "metadatas", "distances"],
+    )
     dense_ids: List[str] = dense["ids"][0]
 
     # ---- RRF fusion ----
     fused = rrf_fuse([bm25_ids, dense_ids], k=RRF_K)
     fused_top = [cid for cid, _ in fused[:FINAL_TOPK]]
 
-    # ---- Fetch final docs from Chroma for consistent metadata ----
-    got = collection.get(ids=fused_top)
-    id_to_doc = {got["ids"][i]: got["documents"][i] for i in range(len(got["ids"]))}
-    id_to_meta = {got["ids"][i]: got["metadatas"][i] for i in range(len(got["ids"]))}
+    # ---- Reuse payloads already returned by the dense query ----
+    id_to_doc = dict(zip(dense_ids, dense["documents"][0]))
+    id_to_meta = dict(zip(dense_ids, dense["metadatas"][0]))
+
+    # Only BM25-only hits still need a Chroma round trip
+    missing = [cid for cid in fused_top if cid not in id_to_doc]
+    if missing:
+        got = collection.get(ids=missing, include=["documents", "metadatas"])
+        id_to_doc.update(zip(got["ids"], got["documents"]))
+        id_to_meta.update(zip(got["ids"], got["metadatas"]))
 
     # ---- Pretty print ----
     print("🔀 Hybrid RRF — query:", TEST_QUERY)
     print("=" * 80)
     for rank, cid in enumerate(fused_top, start=1):
-        meta = id_to_meta.get(cid, metas.get(cid, {})) or {}
+        meta = id_to_meta.get(cid, {}) or {}
         text = id_to_doc.get(cid, "")
         snippet = (text[:300] or "").replace("\n", " ")
         print(f"[Rank {rank}] ID: {cid} | Chapter: {meta.get('chapter')} | Order: {meta.get('order')} | Tokens: {meta.get('tokens')}")
@@ -26,16 +26,41 @@ from __future__ import annotations
 import argparse
 import json
 import os
+import shelve
 from typing import List, Dict, Any, Optional, Tuple
 
+import numpy as np
+
 from Retriever_Development.v4.hybrid_retriever_v4 import HybridRetrieverV4, RetrieverConfig
 
+# Optional numba JIT for the RRF fusion + top-k kernel; NumPy fallback otherwise.
+try:
+    from numba import njit  # type: ignore
+    _HAVE_NUMBA = True
+except Exception:  # pragma: no cover - numba is optional
+    njit = None
+    _HAVE_NUMBA = False
+
+# Optional orjson for faster JSONL writing; stdlib fallback otherwise.
+try:
+    import orjson  # type: ignore
+except Exception:  # pragma: no cover - orjson is optional
+    orjson = None
+
+
+def dumps_jsonl(obj: Dict[str, Any]) -> str:
+    """Serialize one JSONL line (orjson when available, stdlib otherwise)."""
+    if orjson is not None:
+        return orjson.dumps(obj).decode("utf-8")
+    return json.dumps(obj, ensure_ascii=False)
+
 
 # ------------------------------- Defaults ---------------------------------- #
 
 PROJECT_ROOT = os.path.abspath(os.path.join(os.path.dirname(__file__), "..", ".."))
 DEFAULT_OUT = os.path.join(PROJECT_ROOT, "configs", "eval", "qrels_v4.jsonl")
 DEFAULT_QUERIES_FILE = os.path.join(PROJECT_ROOT, "configs", "eval", "queries_v4.txt")
+DEFAULT_CACHE = os.path.join(PROJECT_ROOT, "artifacts", "v4", "qrels_cache.shelf")
 
 # Fallback built-in queries if queries_v4.txt is missing
 BUILTIN_QUERIES = [
@@ -62,6 +87,78 @@ BUILTIN_QUERIES = [
 ]
 
 
+# --------------------------- RRF fusion kernel ------------------------------ #
+
+def _rrf_topk_kernel(a: np.ndarray, b: np.ndarray, k: int, out_k: int, n_ids: int) -> np.ndarray:
+    """
+    Fuse two ranked lists of int32 doc indices with RRF (score 1/(k+rank)) and
+    return the indices of the top `out_k` fused docs, best first.
+    Pure-NumPy reference implementation (also the numba source, see below).
+    """
+    scores = np.zeros(n_ids, dtype=np.float32)
+    for rank in range(a.shape[0]):
+        scores[a[rank]] += 1.0 / (k + rank + 1)
+    for rank in range(b.shape[0]):
+        scores[b[rank]] += 1.0 / (k + rank + 1)
+    # Full stable sort instead of argpartition: ties must break by lowest
+    # index (first-seen order), exactly like the numba kernel below, so the
+    # silver labels don't depend on which implementation is installed.
+    out_k = min(out_k, n_ids)
+    return np.argsort(-scores, kind="stable")[:out_k].astype(np.int32)
+
+
+if _HAVE_NUMBA:
+    @njit(cache=True)
+    def _rrf_topk_jit(a, b, k, out_k, n_ids):  # pragma: no cover - needs numba
+        scores = np.zeros(n_ids, dtype=np.float32)
+        for rank in range(a.shape[0]):
+            scores[a[rank]] += 1.0 / (k + rank + 1)
+        for rank in range(b.shape[0]):
+            scores[b[rank]] += 1.0 / (k + rank + 1)
+        if out_k > n_ids:
+            out_k = n_ids
+        out = np.empty(out_k, dtype=np.int32)
+        for j in range(out_k):
+            best = 0
+            best_score = np.float32(-1.0)
+            for i in range(n_ids):
+                if scores[i] > best_score:
+                    best_score = scores[i]
+                    best = i
+            out[j] = best
+            scores[best] = -2.0  # exclude from further picks
+        return out
+
+    rrf_topk = _rrf_topk_jit
+else:
+    rrf_topk = _rrf_topk_kernel
+
+
+def fuse_rrf_topk(
+    dense_ids: List[str],
+    sparse_ids: List[str],
+    rrf_k: int,
+    out_k: int,
+) -> List[str]:
+    """
+    RRF-fuse two id lists and return the top `out_k` fused ids (best first).
+    Maps string ids to int32 indices so the hot loop runs on arrays.
+    """
+    id_to_idx: Dict[str, int] = {}
+    for doc_id in dense_ids:
+        id_to_idx.setdefault(doc_id, len(id_to_idx))
+    for doc_id in sparse_ids:
+        id_to_idx.setdefault(doc_id, len(id_to_idx))
+    if not id_to_idx:
+        return []
+    idx_to_id = list(id_to_idx)
+
+    a = np.fromiter((id_to_idx[i] for i in dense_ids), dtype=np.int32, count=len(dense_ids))
+    b = np.fromiter((id_to_idx[i] for i in sparse_ids), dtype=np.int32, count=len(sparse_ids))
+    top = rrf_topk(a, b, rrf_k, min(out_k, len(id_to_idx)), len(id_to_idx))
+    return [idx_to_id[int(i)] for i in top]
+
+
 # ------------------------------- Helpers ----------------------------------- #
 
 def read_queries(path: str) -> List[str]:
@@ -97,9 +194,10 @@ def autolabel_for_query(
     dense_ids = [i for i, _ in dense]
     sparse_ids = [i for i, _ in sparse]
 
-    # 2) RRF fuse for fallback
-    fused_scores = retriever._rrf_fuse(dense_results=dense, sparse_results=sparse, k=rrf_k)
-    fused_sorted = [doc_id for doc_id, _ in sorted(fused_scores.items(), key=lambda x: x[1], reverse=True)]
+    # 2) RRF fuse for fallback (array kernel; JIT-compiled when numba is present)
+    fused_sorted = fuse_rrf_topk(
+        dense_ids, sparse_ids, rrf_k=rrf_k, out_k=max(min_rel, 10)
+    )
 
     # 3) Primary silver labels: intersection (preserve dense order)
     intersection = [i for i in dense_ids if i in set(sparse_ids)]
@@ -143,6 +241,9 @@ def build_argparser() -> argparse.ArgumentParser:
     # Allow overriding retriever config if needed
     p.add_argument("--chroma-path", type=str, default=None)
     p.add_argument("--collection", type=str, default=None)
+
+    p.add_argument("--no-cache", action="store_true",
+                   help="Disable the persistent autolabel cache (always hit the retriever).")
     return p
 
 
@@ -157,25 +258,45 @@ def main(argv: Optional[List[str]] = None) -> int:
         cfg.chroma_collection = args.collection
     retriever = HybridRetrieverV4(cfg)
 
-    # Read queries
-    queries = read_queries(args.queries_file)
+    # Read queries; drop duplicates up front (preserve first-seen order)
+    queries = list(dict.fromkeys(read_queries(args.queries_file)))
     ensure_dir_for_file(args.out)
 
+    # Persistent autolabel cache so repeated sweeps (e.g. different --rrf-k)
+    # hit the retriever exactly once per unique query/parameter combination.
+    # Keys are scoped to the effective Chroma store so --chroma-path /
+    # --collection overrides never replay labels from another corpus.
+    cache = None
+    cache_scope = f"{os.path.abspath(cfg.chroma_path)}|{cfg.chroma_collection}"
+    if not args.no_cache:
+        ensure_dir_for_file(DEFAULT_CACHE)
+        cache = shelve.open(DEFAULT_CACHE)
+
     # Generate and write JSONL
     written = 0
-    with open(args.out, "w", encoding="utf-8") as fw:
-        for q in queries:
-            rel_ids, _dbg = autolabel_for_query(
-                retriever=retriever,
-                query=q,
-                k_dense=args.k_dense,
-                k_sparse=args.k_sparse,
-                rrf_k=args.rrf_k,
-                min_rel=args.min_rel,
-            )
-            line = {"query": q, "relevant_ids": rel_ids, "filters": None}
-            fw.write(json.dumps(line, ensure_ascii=False) + "\n")
-            written += 1
+    try:
+        with open(args.out, "w", encoding="utf-8") as fw:
+            for q in queries:
+                key = f"{cache_scope}|{q}|{args.k_dense}|{args.k_sparse}|{args.rrf_k}|{args.min_rel}"
+                if cache is not None and key in cache:
+                    rel_ids = cache[key]
+                else:
+                    rel_ids, _dbg = autolabel_for_query(
+                        retriever=retriever,
+                        query=q,
+                        k_dense=args.k_dense,
+                        k_sparse=args.k_sparse,
+                        rrf_k=args.rrf_k,
+                        min_rel=args.min_rel,
+                    )
+                    if cache is not None:
+                        cache[key] = rel_ids
+                line = {"query": q, "relevant_ids": rel_ids, "filters": None}
+                fw.write(dumps_jsonl(line) + "\n")
+                written += 1
+    finally:
+        if cache is not None:
+            cache.close()
 
     print(f"[OK] Wrote {written} qrels to: {os.path.abspath(args.out)}")
     return 0
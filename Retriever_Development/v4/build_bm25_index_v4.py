@@ -23,6 +23,7 @@ What it writes:
     artifacts/v4/bm25_index/
         bm25_fb_v4.*          # BM25S serialized arrays (created by bm25s.save)
         index_meta.json       # {"ids": [...], "source": "...", ...}
+        corpus_debug.jsonl    # raw docs, only written with --debug
 
 All comments are in English by project policy.
 """
@@ -71,9 +72,11 @@ def save_meta(ids: List[str], out_dir: str, source: str, extra: Dict[str, Any])
         json.dump(payload, f, ensure_ascii=False, indent=2)
 
 
-def load_from_chroma(chroma_path: str, collection_name: str) -> Tuple[List[str], List[str]]:
+def load_from_chroma(chroma_path: str, collection_name: str) -> Tuple[List[str], List[str], List[Any]]:
     """
-    Iterate the existing Chroma collection and return parallel lists (ids, docs).
+    Iterate the existing Chroma collection and return parallel lists
+    (ids, docs, embeddings). Embeddings come along for free and are persisted
+    row-aligned with the ids so the retriever can mmap them for MMR.
     NOTE: Do NOT include "ids" in `include` — Chroma returns IDs by default.
     """
     if chromadb is None:
@@ -84,25 +87,30 @@ def load_from_chroma(chroma_path: str, collection_name: str) -> Tuple[List[str],
 
     ids: List[str] = []
     docs: List[str] = []
+    embs: List[Any] = []
 
     offset = 0
     batch = 512
     while offset < total:
         # VALID includes: "documents", "embeddings", "metadatas", "distances"
-        got = col.get(include=["documents"], limit=batch, offset=offset)
+        got = col.get(include=["documents", "embeddings"], limit=batch, offset=offset)
         got_ids = got.get("ids", [])
         got_docs = got.get("documents", [])
+        got_embs = got.get("embeddings")
+        if got_embs is None:
+            got_embs = [None] * len(got_ids)
 
-        for i, d in zip(got_ids, got_docs):
+        for i, d, e in zip(got_ids, got_docs, got_embs):
             if d is None or str(d).strip() == "":
                 continue
             ids.append(str(i))
             docs.append(str(d))
+            embs.append(e)
         offset += batch
 
     if not ids:
         raise RuntimeError(f"No documents found in Chroma collection '{collection_name}' at {chroma_path}")
-    return ids, docs
+    return ids, docs, embs
 
 
 
@@ -141,6 +149,39 @@ def load_from_json(json_path: str) -> Tuple[List[str], List[str]]:
     return ids, docs
 
 
+def save_doc_side_factors(corpus_tokens: Any, k1: float, b: float, out_dir: str) -> None:
+    """
+    Precompute the per-doc BM25 denominator constant k1*(1 - b + b*|D|/L_avg)
+    and per-term IDF as float32 arrays, saved as .npy so consumers can mmap
+    them (turns per-query scoring into table lookups for custom scorers).
+    """
+    token_ids = getattr(corpus_tokens, "ids", corpus_tokens)
+    doc_lens = np.fromiter((len(t) for t in token_ids), dtype=np.float32, count=len(token_ids))
+    l_avg = float(doc_lens.mean()) if doc_lens.size else 1.0
+    denom_const = (k1 * (1.0 - b + b * doc_lens / l_avg)).astype(np.float32)
+    np.save(os.path.join(out_dir, "denom_const.npy"), denom_const)
+
+    # Document frequency per term id -> Robertson/Sparck-Jones IDF
+    vocab = getattr(corpus_tokens, "vocab", None)
+    n_terms = len(vocab) if vocab else int(max((max(t) for t in token_ids if t), default=-1)) + 1
+    df = np.zeros(n_terms, dtype=np.int64)
+    for t in token_ids:
+        for term in set(t):
+            df[term] += 1
+    n_docs = len(token_ids)
+    idf = np.log(1.0 + (n_docs - df + 0.5) / (df + 0.5)).astype(np.float32)
+    np.save(os.path.join(out_dir, "idf.npy"), idf)
+
+
+def save_corpus_jsonl(ids: List[str], docs: List[str], out_dir: str) -> str:
+    """Write raw docs as JSONL for debugging (only when --debug is passed)."""
+    path = os.path.join(out_dir, "corpus_debug.jsonl")
+    with open(path, "w", encoding="utf-8") as f:
+        for doc_id, doc in zip(ids, docs):
+            f.write(json.dumps({"id": doc_id, "text": doc}, ensure_ascii=False) + "\n")
+    return path
+
+
 def tokenize_corpus(docs: List[str], stemming: bool) -> Any:
     """
     Tokenize the corpus using bm25s.tokenize. If stemming=True and PyStemmer is available,
@@ -171,10 +212,12 @@ def build_index(
     b: float,
     delta: float,
     stemming: bool,
+    debug: bool = False,
 ) -> None:
-    # 1) Load corpus
+    # 1) Load corpus (embeddings only available when reading from Chroma)
+    embs: List[Any] = []
     if source == "chroma":
-        ids, docs = load_from_chroma(chroma_path, collection_name)
+        ids, docs, embs = load_from_chroma(chroma_path, collection_name)
     else:
         ids, docs = load_from_json(json_path)
 
@@ -191,8 +234,19 @@ def build_index(
     # 5) Persist index and aligned ID mapping
     ensure_dir(out_dir)
     basepath = os.path.join(out_dir, index_basename)
-    # Save arrays + (optionally) the raw corpus for debugging
-    retriever.save(basepath, corpus=docs)
+    # Save arrays without pickling the raw corpus; bm25s already writes the
+    # CSR score arrays as mmap-able .npy files that BM25.load(mmap=True) uses.
+    retriever.save(basepath)
+    save_doc_side_factors(corpus_tokens, k1=k1, b=b, out_dir=out_dir)
+
+    # Row-aligned embedding matrix (SoA) so the retriever can mmap it and
+    # skip per-query Chroma embedding fetches entirely during MMR.
+    if embs and all(e is not None for e in embs):
+        np.save(os.path.join(out_dir, "embeddings.npy"), np.asarray(embs, dtype=np.float32))
+        print(f"[OK] Saved embedding matrix: {os.path.join(out_dir, 'embeddings.npy')}")
+    if debug:
+        dbg_path = save_corpus_jsonl(ids, docs, out_dir)
+        print(f"[DEBUG] Wrote raw corpus to: {dbg_path}")
 
     extra = {
         "collection": collection_name if source == "chroma" else None,
@@ -232,6 +286,8 @@ def parse_args() -> argparse.Namespace:
     p.add_argument("--b", type=float, default=0.75, help="BM25 b parameter (0-1, default 0.75).")
     p.add_argument("--delta", type=float, default=0.5, help="Delta for BM25+ / BM25L.")
     p.add_argument("--stemming", action="store_true", help="Enable English stemming if PyStemmer is available.")
+    p.add_argument("--debug", action="store_true",
+                   help="Also dump the raw corpus to corpus_debug.jsonl for inspection.")
 
     return p.parse_args()
 
@@ -250,4 +306,5 @@ if __name__ == "__main__":
         b=args.b,
         delta=args.delta,
         stemming=args.stemming,
+        debug=args.debug,
     )
@@ -28,12 +28,19 @@ from __future__ import annotations
 import argparse
 import json
 import os
+import socket
 import sys
 from typing import Any, Dict, Iterable, List, Optional
 
 # Import our retriever
 from Retriever_Development.v4.hybrid_retriever_v4 import HybridRetrieverV4, RetrieverConfig
 
+# Optional orjson for faster JSONL output; stdlib fallback otherwise.
+try:
+    import orjson  # type: ignore
+except Exception:  # pragma: no cover - orjson is optional
+    orjson = None
+
 
 # ------------------------------- CLI utils --------------------------------- #
 
@@ -68,6 +75,33 @@ def _parse_filters(filters_str: Optional[str]) -> Optional[Dict[str, Any]]:
         raise ValueError(f"Invalid JSON for --filters: {e}") from e
 
 
+def _retrieve_via_daemon(
+    sock_path: str,
+    query: str,
+    k: Optional[int],
+    filters: Optional[Dict[str, Any]],
+) -> List[Dict[str, Any]]:
+    """
+    Forward one query to a running retriever_daemon over its UNIX socket.
+    The daemon keeps Chroma + the embedding model warm, so this path skips
+    the multi-second cold start entirely.
+    """
+    request = {"query": query, "k": k, "filters": filters}
+    results: List[Dict[str, Any]] = []
+    with socket.socket(socket.AF_UNIX, socket.SOCK_STREAM) as sock:
+        sock.connect(sock_path)
+        with sock.makefile("rwb") as f:
+            f.write(json.dumps(request, ensure_ascii=False).encode("utf-8") + b"\n")
+            f.flush()
+            sock.shutdown(socket.SHUT_WR)
+            for line in f:
+                obj = json.loads(line)
+                if "error" in obj:
+                    raise RuntimeError(f"Retriever daemon error: {obj['error']}")
+                results.append(obj)
+    return results
+
+
 def _print_pretty(query: str, results: List[Dict[str, Any]], snippet: int, meta_keys: Optional[List[str]]) -> None:
     """Human-friendly printing."""
     print(f"\n=== Query: {query} ===")
@@ -107,7 +141,10 @@ def _print_json(query: str, results: List[Dict[str, Any]]) -> None:
             "metadata": r.get("metadata"),
             "document": r.get("document"),
         }
-        print(json.dumps(payload, ensure_ascii=False))
+        if orjson is not None:
+            print(orjson.dumps(payload).decode("utf-8"))
+        else:
+            print(json.dumps(payload, ensure_ascii=False))
 
 
 def _print_ids(results: List[Dict[str, Any]]) -> None:
@@ -173,8 +210,13 @@ def main(argv: Optional[List[str]] = None) -> int:
     if args.k is not None:
         cfg.final_k = int(args.k)
 
-    # Build retriever once
-    retriever = HybridRetrieverV4(cfg)
+    # If a daemon is running (see retriever_daemon.py), forward queries to it
+    # instead of paying the in-process cold start. Config overrides other than
+    # -k/--filters are fixed at daemon startup in that mode.
+    daemon_sock = os.environ.get("RETRIEVER_SOCK")
+
+    # Build retriever once (only needed for the in-process path)
+    retriever = None if daemon_sock else HybridRetrieverV4(cfg)
 
     # Queries
     queries = _read_queries(args.q, args.q_file)
@@ -184,13 +226,16 @@ def main(argv: Optional[List[str]] = None) -> int:
     meta_keys = [s.strip() for s in args.meta_keys.split(",")] if args.meta_keys else None
 
     for q in queries:
-        results = retriever.retrieve(
-            query=q,
-            k=cfg.final_k,
-            use_rerank=bool(args.rerank),
-            use_hyde=bool(args.hyde),
-            filters=filters,
-        )
+        if daemon_sock:
+            results = _retrieve_via_daemon(daemon_sock, q, k=cfg.final_k, filters=filters)
+        else:
+            results = retriever.retrieve(
+                query=q,
+                k=cfg.final_k,
+                use_rerank=bool(args.rerank),
+                use_hyde=bool(args.hyde),
+                filters=filters,
+            )
         if args.format == "pretty":
             _print_pretty(q, results, snippet=max(0, int(args.snippet)), meta_keys=meta_keys)
         elif args.format == "json":
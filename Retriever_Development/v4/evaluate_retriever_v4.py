@@ -24,22 +24,32 @@ from __future__ import annotations
 import argparse
 import csv
 import json
-import math
 import os
+from concurrent.futures import ThreadPoolExecutor
 from dataclasses import dataclass, asdict
 from datetime import datetime, timezone
-from statistics import mean, median
-from typing import Any, Dict, List, Optional, Tuple
+from functools import lru_cache
+from typing import Any, Dict, FrozenSet, List, Optional, Tuple
+
+import numpy as np
 
 from Retriever_Development.v4.hybrid_retriever_v4 import HybridRetrieverV4, RetrieverConfig
 
+# Optional orjson for faster JSONL parsing; stdlib fallback otherwise.
+try:
+    import orjson  # type: ignore
+    _loads = orjson.loads
+except Exception:  # pragma: no cover - orjson is optional
+    orjson = None
+    _loads = json.loads
+
 
 # ------------------------------- Data types -------------------------------- #
 
 @dataclass
 class QrelItem:
     query: str
-    relevant_ids: List[str]
+    relevant_ids: FrozenSet[str]  # frozen at load time; metric code does containment only
     filters: Optional[Dict[str, Any]] = None
 
 
@@ -65,75 +75,73 @@ def read_qrels(path: str) -> List[QrelItem]:
     if not os.path.exists(path):
         raise FileNotFoundError(f"Qrels file not found: {path}")
     items: List[QrelItem] = []
-    with open(path, "r", encoding="utf-8") as f:
+    # Binary mode: both orjson and stdlib json accept bytes, and the parser
+    # tolerates the trailing newline, so no per-line strip/decode is needed.
+    with open(path, "rb") as f:
         for ln in f:
-            ln = ln.strip()
-            if not ln:
+            if not ln.strip():
                 continue
-            obj = json.loads(ln)
+            obj = _loads(ln)
             q = str(obj.get("query", "")).strip()
             rel = obj.get("relevant_ids", []) or []
             flt = obj.get("filters")
-            items.append(QrelItem(query=q, relevant_ids=[str(x) for x in rel], filters=flt))
+            items.append(QrelItem(query=q, relevant_ids=frozenset(str(x) for x in rel), filters=flt))
     if not items:
         raise ValueError("Qrels file is empty.")
     return items
 
 
-def dcg_at_k(retrieved: List[str], relevant: set, k: int) -> float:
-    """Binary gains DCG@k: sum(1/log2(1+rank)) for hits within top-k."""
-    dcg = 0.0
-    for rank, doc_id in enumerate(retrieved[:k], start=1):
-        if doc_id in relevant:
-            dcg += 1.0 / math.log2(1.0 + rank)
-    return dcg
-
-
-def idcg_at_k(rel_count: int, k: int) -> float:
-    """Ideal DCG@k for binary gains given rel_count relevant docs total."""
-    m = min(rel_count, k)
-    return sum(1.0 / math.log2(1.0 + r) for r in range(1, m + 1))
-
-
-def ndcg_at_k(retrieved: List[str], relevant: set, k: int) -> float:
-    ideal = idcg_at_k(len(relevant), k)
-    if ideal == 0.0:
-        return 0.0
-    return dcg_at_k(retrieved, relevant, k) / ideal
+@lru_cache(maxsize=32)
+def _discounts(k: int) -> np.ndarray:
+    """Rank discounts 1/log2(1+rank) for ranks 1..k, cached per k."""
+    d = 1.0 / np.log2(np.arange(2, k + 2, dtype=np.float64))
+    d.setflags(write=False)  # cached arrays are shared; keep them immutable
+    return d
 
 
-def recall_at_k(retrieved: List[str], relevant: set, k: int) -> float:
-    if not relevant:
-        return 0.0
-    hits = sum(1 for doc_id in retrieved[:k] if doc_id in relevant)
-    return hits / float(len(relevant))
+@lru_cache(maxsize=32)
+def _idcg_table(k: int) -> np.ndarray:
+    """Cumulative ideal DCG indexed by number of relevant docs (0..k)."""
+    t = np.concatenate(([0.0], np.cumsum(_discounts(k))))
+    t.setflags(write=False)
+    return t
 
 
-def mrr_at_k(retrieved: List[str], relevant: set, k: int) -> float:
-    for rank, doc_id in enumerate(retrieved[:k], start=1):
-        if doc_id in relevant:
-            return 1.0 / float(rank)
-    return 0.0
+def compute_metrics(
+    retrieved: List[str],
+    relevant: set,
+    k: int,
+    discounts: Optional[np.ndarray] = None,
+    idcg_table: Optional[np.ndarray] = None,
+) -> Tuple[float, float, float, Optional[int], int]:
+    """
+    Compute (recall@k, nDCG@k, MRR@k, first_rel_rank, hit_count) from a single
+    boolean hit mask instead of re-scanning the retrieved list per metric.
+    `discounts`/`idcg_table` can be precomputed once per run (see evaluate()).
+    """
+    if discounts is None:
+        discounts = _discounts(k)
+    if idcg_table is None:
+        idcg_table = _idcg_table(k)
 
+    topk = retrieved[:k]
+    hits = np.fromiter((doc_id in relevant for doc_id in topk), dtype=np.bool_, count=len(topk))
+    hit_count = int(hits.sum())
 
-def first_rel_rank(retrieved: List[str], relevant: set, k: int) -> Optional[int]:
-    for rank, doc_id in enumerate(retrieved[:k], start=1):
-        if doc_id in relevant:
-            return rank
-    return None
+    recall = hit_count / float(len(relevant)) if relevant else 0.0
 
+    # Binary-gain DCG: sum(1/log2(1+rank)) over hit positions
+    dcg = float((hits * discounts[: hits.size]).sum())
+    ideal = float(idcg_table[min(len(relevant), k)])
+    ndcg = dcg / ideal if ideal > 0.0 else 0.0
 
-def percentile(values: List[int], p: float) -> float:
-    """
-    Simple percentile (p in [0,100]). Inclusive method:
-    idx = ceil(p/100 * n) - 1 on 1-based ranks.
-    """
-    if not values:
-        return float("nan")
-    xs = sorted(values)
-    n = len(xs)
-    pos = max(1, math.ceil(p / 100.0 * n))
-    return float(xs[pos - 1])
+    if hit_count:
+        first = int(np.argmax(hits)) + 1
+        mrr = 1.0 / first
+    else:
+        first = None
+        mrr = 0.0
+    return recall, ndcg, mrr, first, hit_count
 
 
 # ------------------------------- Evaluation -------------------------------- #
@@ -142,56 +150,90 @@ def evaluate(
     retriever: HybridRetrieverV4,
     qrels: List[QrelItem],
     k: int,
-) -> Tuple[List[PerQueryMetrics], Dict[str, Any]]:
-    per_query: List[PerQueryMetrics] = []
-    first_hits: List[int] = []
-    recalls: List[float] = []
-    ndcgs: List[float] = []
-    mrrs: List[float] = []
-
-    for item in qrels:
-        rel_set = set(item.relevant_ids)
-        # Retrieve results
-        res = retriever.retrieve(query=item.query, k=k, filters=item.filters)
-        ids = [r.get("id") for r in res]
-
-        r_at_k = recall_at_k(ids, rel_set, k)
-        n_at_k = ndcg_at_k(ids, rel_set, k)
-        mrr = mrr_at_k(ids, rel_set, k)
-        first = first_rel_rank(ids, rel_set, k)
-
-        per_query.append(
-            PerQueryMetrics(
+    workers: int = 1,
+):
+    """
+    Generator yielding one PerQueryMetrics per qrel item, in qrels order.
+    Streaming keeps memory at O(1) per query (retrieved_ids are not
+    accumulated here) and lets callers write CSV rows as results arrive;
+    use summarize() on the collected scalar metrics for the run summary.
+    """
+    n_q = len(qrels)
+
+    # Shared tables for all queries: rank discounts and cumulative ideal DCG,
+    # so nDCG never recomputes logs inside the loop (cached across calls too).
+    discounts = _discounts(k)
+    idcg_table = _idcg_table(k)
+
+    # Dispatch retrieval in batches: Chroma and bm25s both accept multi-query
+    # calls, which amortizes per-call overhead. Per-item filters force the
+    # single-query path (Chroma applies one `where` per call).
+    batch_size = 64
+    chunks = [qrels[start : start + batch_size] for start in range(0, n_q, batch_size)]
+
+    def _retrieve_chunk(chunk: List[QrelItem]) -> List[List[Dict[str, Any]]]:
+        # ids_only: evaluation never reads documents/metadata, so skip the
+        # final payload fetch inside the retriever.
+        if all(item.filters is None for item in chunk):
+            return retriever.retrieve_batch(
+                [item.query for item in chunk], k=k, ids_only=True
+            )
+        return [
+            retriever.retrieve(query=item.query, k=k, filters=item.filters, ids_only=True)
+            for item in chunk
+        ]
+
+    # Retrieval is I/O- and BLAS-bound (Chroma, bm25s), so threads overlap it
+    # nicely; metric aggregation stays single-threaded in submission order.
+    if workers > 1 and len(chunks) > 1:
+        with ThreadPoolExecutor(max_workers=workers) as pool:
+            chunk_results = list(pool.map(_retrieve_chunk, chunks))
+    else:
+        chunk_results = [_retrieve_chunk(chunk) for chunk in chunks]
+
+    for chunk, res_lists in zip(chunks, chunk_results):
+        for item, res in zip(chunk, res_lists):
+            ids = [r.get("id") for r in res]
+
+            r_at_k, n_at_k, mrr, first, hit_count = compute_metrics(
+                ids, item.relevant_ids, k, discounts=discounts, idcg_table=idcg_table
+            )
+
+            yield PerQueryMetrics(
                 query=item.query,
-                rel_count=len(rel_set),
-                hit_count=sum(1 for i in ids[:k] if i in rel_set),
+                rel_count=len(item.relevant_ids),
+                hit_count=hit_count,
                 recall_at_k=r_at_k,
                 ndcg_at_k=n_at_k,
                 mrr_at_k=mrr,
                 first_rel_rank=first,
                 retrieved_ids=ids[:k],
             )
-        )
-
-        recalls.append(r_at_k)
-        ndcgs.append(n_at_k)
-        mrrs.append(mrr)
-        if first is not None:
-            first_hits.append(first)
-        else:
-            # If no hit within top-k, treat as k+1 for percentiles of first relevant
-            first_hits.append(k + 1)
 
-    summary = {
-        "queries": len(qrels),
+
+def summarize(
+    recalls: np.ndarray,
+    ndcgs: np.ndarray,
+    mrrs: np.ndarray,
+    first_hits: np.ndarray,
+    k: int,
+) -> Dict[str, Any]:
+    """Aggregate the scalar per-query metric arrays into the run summary."""
+    n_q = int(recalls.size)
+    # 'inverted_cdf' matches the old nearest-rank percentile definition
+    if n_q:
+        p50, p95 = np.percentile(first_hits, [50.0, 95.0], method="inverted_cdf")
+    else:
+        p50 = p95 = float("nan")
+    return {
+        "queries": n_q,
         "k": k,
-        "recall_at_k_mean": mean(recalls) if recalls else 0.0,
-        "ndcg_at_k_mean": mean(ndcgs) if ndcgs else 0.0,
-        "mrr_at_k_mean": mean(mrrs) if mrrs else 0.0,
-        "first_rel_rank_p50": percentile(first_hits, 50.0),
-        "first_rel_rank_p95": percentile(first_hits, 95.0),
+        "recall_at_k_mean": float(recalls.mean()) if n_q else 0.0,
+        "ndcg_at_k_mean": float(ndcgs.mean()) if n_q else 0.0,
+        "mrr_at_k_mean": float(mrrs.mean()) if n_q else 0.0,
+        "first_rel_rank_p50": float(p50),
+        "first_rel_rank_p95": float(p95),
     }
-    return per_query, summary
 
 
 # ----------------------------------- CLI ----------------------------------- #
@@ -200,6 +242,8 @@ def build_argparser() -> argparse.ArgumentParser:
     p = argparse.ArgumentParser(description="Evaluate HybridRetrieverV4 on qrels JSONL.")
     p.add_argument("--qrels", type=str, required=True, help="Path to qrels JSONL file.")
     p.add_argument("--k", type=int, default=10, help="Top-K to evaluate (default: 10).")
+    p.add_argument("--workers", type=int, default=1,
+                   help="Thread workers for retrieval batches (default: 1 = sequential).")
 
     # Optional overrides for retriever config
     p.add_argument("--candidates", type=int, default=None, help="Candidate pool per branch before fusion.")
@@ -236,8 +280,52 @@ def main(argv: Optional[List[str]] = None) -> int:
     # Load qrels
     qrels = read_qrels(args.qrels)
 
-    # Evaluate
-    per_query, summary = evaluate(retriever, qrels, k=int(args.k))
+    # Evaluate: stream per-query metrics, writing CSV rows as they arrive and
+    # keeping only the four scalar arrays needed for the summary in memory.
+    k = int(args.k)
+    n_q = len(qrels)
+    recalls = np.empty(n_q, dtype=np.float32)
+    ndcgs = np.empty(n_q, dtype=np.float32)
+    mrrs = np.empty(n_q, dtype=np.float32)
+    first_hits = np.empty(n_q, dtype=np.float32)
+
+    writer = None
+    fcsv = None
+    if args.out_csv:
+        ensure_dir_for_file(args.out_csv)
+        fcsv = open(args.out_csv, "w", encoding="utf-8", newline="")
+        writer = csv.writer(fcsv)
+        writer.writerow([
+            "query", "rel_count", "hit_count",
+            "recall@k", "nDCG@k", "MRR@k", "first_rel_rank",
+            "retrieved_ids",
+        ])
+
+    try:
+        for qi, item in enumerate(
+            evaluate(retriever, qrels, k=k, workers=max(1, int(args.workers)))
+        ):
+            recalls[qi] = item.recall_at_k
+            ndcgs[qi] = item.ndcg_at_k
+            mrrs[qi] = item.mrr_at_k
+            # If no hit within top-k, treat as k+1 for percentiles of first relevant
+            first_hits[qi] = item.first_rel_rank if item.first_rel_rank is not None else k + 1
+            if writer is not None:
+                writer.writerow([
+                    item.query,
+                    item.rel_count,
+                    item.hit_count,
+                    f"{item.recall_at_k:.6f}",
+                    f"{item.ndcg_at_k:.6f}",
+                    f"{item.mrr_at_k:.6f}",
+                    item.first_rel_rank if item.first_rel_rank is not None else "",
+                    " ".join(item.retrieved_ids),
+                ])
+    finally:
+        if fcsv is not None:
+            fcsv.close()
+
+    summary = summarize(recalls, ndcgs, mrrs, first_hits, k=k)
 
     # Compose run info
     run_info = {
@@ -259,28 +347,6 @@ def main(argv: Optional[List[str]] = None) -> int:
     with open(args.out_json, "w", encoding="utf-8") as fjson:
         json.dump(run_info, fjson, ensure_ascii=False, indent=2)
 
-    # Optional CSV per-query
-    if args.out_csv:
-        ensure_dir_for_file(args.out_csv)
-        with open(args.out_csv, "w", encoding="utf-8", newline="") as fcsv:
-            writer = csv.writer(fcsv)
-            writer.writerow([
-                "query", "rel_count", "hit_count",
-                "recall@k", "nDCG@k", "MRR@k", "first_rel_rank",
-                "retrieved_ids",
-            ])
-            for item in per_query:
-                writer.writerow([
-                    item.query,
-                    item.rel_count,
-                    item.hit_count,
-                    f"{item.recall_at_k:.6f}",
-                    f"{item.ndcg_at_k:.6f}",
-                    f"{item.mrr_at_k:.6f}",
-                    item.first_rel_rank if item.first_rel_rank is not None else "",
-                    " ".join(item.retrieved_ids),
-                ])
-
     # Pretty print to console
     print("\n=== Evaluation Summary ===")
     print(f"Queries:               {summary['queries']}")
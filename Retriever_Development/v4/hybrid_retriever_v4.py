@@ -17,6 +17,7 @@ Notes:
 
 from __future__ import annotations
 
+import hashlib
 import os
 import json
 import math
@@ -44,6 +45,7 @@ class RetrieverConfig:
     bm25_dir: str = os.path.join("artifacts", "v4", "bm25_index")
     bm25_index_name: str = "bm25_fb_v4"  # basename used by bm25s.save(...)
     bm25_meta_filename: str = "index_meta.json"  # stores the ordered list of doc IDs
+    embeddings_filename: str = "embeddings.npy"  # row-aligned with meta ids (optional)
 
     # Fusion / post-processing
     rrf_k: int = 60
@@ -54,15 +56,64 @@ class RetrieverConfig:
     # Safety caps
     max_get_batch: int = 256  # max ids to fetch from Chroma in one call
 
+    # The v4 collection stores unit-norm vectors (cosine space, see
+    # reembed_chroma_cosine_v4 with normalize_embeddings=True), so MMR can
+    # treat dot products as cosine similarity without re-normalizing.
+    embeddings_are_normalized: bool = True
+
+    # Disk cache for per-query branch results (dense + sparse). Hits skip the
+    # embedding model and BM25 entirely, which makes parameter sweeps over
+    # rrf_k / mmr_lambda I/O-bound instead of model-bound. Off by default so
+    # the production QA path answers from the live index; opt in for sweeps.
+    cache_dir: str = os.path.join("artifacts", "v4", "retrieve_cache")
+    use_branch_cache: bool = False
+
 
 # ---------------------------- Hybrid Retriever ------------------------------ #
 
+# Cached torch module (None when absent) plus a run-once flag: thread pools
+# are process-wide, so constructing several retrievers must not re-tune them
+# (set_num_interop_threads raises after parallel work has started).
+_TORCH = None
+_TORCH_CONFIGURED = False
+
+
+def _configure_torch_for_inference() -> None:
+    """
+    Best-effort CPU tuning for the embedding model Chroma runs under the hood:
+    use all cores for intra-op math, single inter-op thread. Runs once per
+    process and is a no-op when torch is absent. Autograd is left alone —
+    dense queries run under torch.inference_mode() instead of flipping the
+    process-wide grad flag out from under host apps.
+    """
+    global _TORCH, _TORCH_CONFIGURED
+    if _TORCH_CONFIGURED:
+        return
+    _TORCH_CONFIGURED = True
+    try:
+        import torch  # type: ignore
+        _TORCH = torch
+    except Exception:
+        return  # torch not installed; Chroma may use a non-torch backend
+    try:
+        torch.set_num_threads(os.cpu_count() or 8)
+    except Exception:
+        pass
+    try:
+        torch.set_num_interop_threads(1)
+    except Exception:
+        pass  # raises if the runtime already started inter-op work
+
+
 class HybridRetrieverV4:
     def __init__(self, cfg: RetrieverConfig | None = None) -> None:
         self.cfg = cfg or RetrieverConfig()
+        _configure_torch_for_inference()
         self._client = self._load_chroma_client()
         self._collection = self._get_existing_collection(self.cfg.chroma_collection)
         self._bm25, self._bm25_ids = self._load_bm25_with_ids()
+        self._index_fingerprint = self._bm25_index_fingerprint()
+        self._E, self._id_to_row = self._load_embedding_matrix()
 
     # ---- Chroma (dense) ----
     def _load_chroma_client(self):
@@ -115,6 +166,21 @@ class HybridRetrieverV4:
         bm25 = bm25s.BM25.load(index_base, mmap=True, load_corpus=False)
         return bm25, bm25_ids
 
+    def _load_embedding_matrix(self):
+        """
+        Memory-map the row-aligned embedding matrix written by
+        build_bm25_index_v4 (optional). When present, MMR gathers candidate
+        vectors from it instead of fetching embeddings through Chroma.
+        """
+        emb_path = os.path.join(os.path.abspath(self.cfg.bm25_dir), self.cfg.embeddings_filename)
+        if not os.path.exists(emb_path):
+            return None, {}
+        E = np.load(emb_path, mmap_mode="r")
+        if E.ndim != 2 or E.shape[0] != len(self._bm25_ids):
+            # Stale matrix (index rebuilt without re-exporting embeddings)
+            return None, {}
+        return E, {doc_id: i for i, doc_id in enumerate(self._bm25_ids)}
+
     # ---- Public API ----
     def retrieve(
         self,
@@ -123,19 +189,111 @@ class HybridRetrieverV4:
         use_rerank: bool = False,  # placeholder; cross-encoder rerank can be added later
         use_hyde: bool = False,    # placeholder; hypothetical doc expansion can be added later
         filters: Dict[str, Any] | None = None,
+        ids_only: bool = False,
     ) -> List[Dict[str, Any]]:
         """
         Run hybrid retrieval: dense + sparse -> RRF -> (opt) rerank -> MMR.
         Returns a list of dicts: {id, score, document, metadata}.
+        With ids_only=True the payload fetch is skipped and each dict carries
+        only {id, score} — enough for evaluation against qrels.
         """
         final_k = k or self.cfg.final_k
 
-        # 1) Dense retrieval from Chroma
-        dense = self._dense_search(query, top_k=self.cfg.candidate_pool, filters=filters)
+        # 0) Branch cache: dense + sparse results are independent of the
+        #    fusion/MMR knobs, so sweeps over rrf_k/mmr_lambda can reuse them.
+        #    Filtered queries bypass the cache (filters change the dense set).
+        cache_path = None
+        if self.cfg.use_branch_cache and not filters:
+            cache_path = self._branch_cache_path(query)
+            cached = self._load_branch_cache(cache_path)
+            if cached is not None:
+                dense, emb_cache, sparse = cached
+                return self._fuse_select_payload(
+                    dense, sparse, final_k, emb_cache=emb_cache, ids_only=ids_only
+                )
+
+        # 1) Dense retrieval from Chroma (pairs + embeddings + docs in one call)
+        dense, emb_cache, payload_cache = self._dense_search_batch(
+            [query], top_k=self.cfg.candidate_pool, filters=filters
+        )[0]
 
         # 2) Sparse retrieval from BM25s
         sparse = self._sparse_search(query, top_k=self.cfg.candidate_pool)
 
+        if cache_path is not None:
+            self._save_branch_cache(cache_path, dense, emb_cache, sparse)
+
+        return self._fuse_select_payload(
+            dense, sparse, final_k, emb_cache=emb_cache, payload_cache=payload_cache,
+            ids_only=ids_only,
+        )
+
+    def retrieve_batch(
+        self,
+        queries: List[str],
+        k: int | None = None,
+        filters: Dict[str, Any] | None = None,
+        ids_only: bool = False,
+    ) -> List[List[Dict[str, Any]]]:
+        """
+        Batched variant of retrieve(): one Chroma query() and one bm25s
+        retrieve() for all queries (both backends accept batches natively),
+        then per-query fusion/MMR. `filters` applies to every query.
+        With use_branch_cache the cache is checked per query and only the
+        misses are sent to the backends, so eval sweeps that change only
+        fusion/MMR knobs skip the embedding model and BM25 entirely.
+        """
+        if not queries:
+            return []
+        final_k = k or self.cfg.final_k
+
+        # Per-query cache lookup; filtered queries bypass the cache just like
+        # in retrieve() (filters change the dense candidate set).
+        hits: Dict[int, Tuple[Any, Any, Any]] = {}
+        cache_paths: List[str | None] = [None] * len(queries)
+        miss_idx = list(range(len(queries)))
+        if self.cfg.use_branch_cache and not filters:
+            miss_idx = []
+            for i, q in enumerate(queries):
+                path = self._branch_cache_path(q)
+                cached = self._load_branch_cache(path)
+                if cached is not None:
+                    hits[i] = cached
+                else:
+                    cache_paths[i] = path
+                    miss_idx.append(i)
+
+        dense_batch: List[Any] = []
+        sparse_batch: List[Any] = []
+        if miss_idx:
+            miss_queries = [queries[i] for i in miss_idx]
+            dense_batch = self._dense_search_batch(miss_queries, top_k=self.cfg.candidate_pool, filters=filters)
+            sparse_batch = self._sparse_search_batch(miss_queries, top_k=self.cfg.candidate_pool)
+
+        out: List[List[Dict[str, Any]]] = [None] * len(queries)  # type: ignore[list-item]
+        for i, (dense, emb_cache, payload_cache), sparse in zip(miss_idx, dense_batch, sparse_batch):
+            if cache_paths[i] is not None:
+                self._save_branch_cache(cache_paths[i], dense, emb_cache, sparse)
+            out[i] = self._fuse_select_payload(
+                dense, sparse, final_k, emb_cache=emb_cache, payload_cache=payload_cache,
+                ids_only=ids_only,
+            )
+        for i, (dense, emb_cache, sparse) in hits.items():
+            out[i] = self._fuse_select_payload(
+                dense, sparse, final_k, emb_cache=emb_cache, ids_only=ids_only
+            )
+        return out
+
+    def _fuse_select_payload(
+        self,
+        dense: List[Tuple[str, float]],
+        sparse: List[Tuple[str, float]],
+        final_k: int,
+        emb_cache: Dict[str, Any] | None = None,
+        payload_cache: Dict[str, Dict[str, Any]] | None = None,
+        ids_only: bool = False,
+    ) -> List[Dict[str, Any]]:
+        """Shared tail of retrieve()/retrieve_batch(): RRF -> MMR -> payload."""
         # 3) RRF fuse (works on ranks only, so it's robust to score scales)
         fused_scores = self._rrf_fuse(dense_results=dense, sparse_results=sparse, k=self.cfg.rrf_k)
 
@@ -144,17 +302,35 @@ class HybridRetrieverV4:
 
         # 4) MMR diversity on fused candidates (uses embeddings from Chroma)
         ranked_ids = [doc_id for doc_id, _ in sorted(fused_scores.items(), key=lambda x: x[1], reverse=True)]
-        selected_ids = self._mmr_select(ranked_ids, fused_scores, k=final_k, lambda_mult=self.cfg.mmr_lambda)
-
-        # 5) Fetch final payload (documents + metadata) and return
-        final_payload = self._get_documents_by_ids(selected_ids)
-        # Attach fused+mmr score for transparency
-        score_map = fused_scores
-        for item in final_payload:
-            item["score"] = float(score_map.get(item["id"], 0.0))
-        # Keep the original order as selected by MMR
-        id_to_pos = {doc_id: i for i, doc_id in enumerate(selected_ids)}
-        final_payload.sort(key=lambda d: id_to_pos.get(d["id"], 10**9))
+        selected_ids = self._mmr_select(
+            ranked_ids, fused_scores, k=final_k, lambda_mult=self.cfg.mmr_lambda, emb_cache=emb_cache
+        )
+
+        # ids_only short-circuit: callers that only score against qrels never
+        # look at documents/metadata, so skip the payload work entirely.
+        if ids_only:
+            return [
+                {"id": doc_id, "score": float(fused_scores.get(doc_id, 0.0))}
+                for doc_id in selected_ids
+            ]
+
+        # 5) Build final payload. The dense query already returned documents
+        #    and metadata for its candidates, so only ids that came purely from
+        #    the sparse branch need another Chroma get().
+        payload_cache = payload_cache or {}
+        missing = [doc_id for doc_id in selected_ids if doc_id not in payload_cache]
+        if missing:
+            for item in self._get_documents_by_ids(missing):
+                payload_cache[item["id"]] = item
+        final_payload = [
+            {
+                "id": doc_id,
+                "document": payload_cache.get(doc_id, {}).get("document", ""),
+                "metadata": payload_cache.get(doc_id, {}).get("metadata", {}),
+                "score": float(fused_scores.get(doc_id, 0.0)),
+            }
+            for doc_id in selected_ids
+        ]
         return final_payload
 
     # ---- Dense and Sparse retrieval primitives ----
@@ -175,12 +351,21 @@ class HybridRetrieverV4:
     #     return list(zip(ids, distances))
     
     def _dense_search(self, query: str, top_k: int, filters: Dict[str, Any] | None) -> List[Tuple[str, float]]:
+        """Single-query wrapper around the batched dense search (pairs only)."""
+        return self._dense_search_batch([query], top_k=top_k, filters=filters)[0][0]
+
+    def _dense_search_batch(
+        self, queries: List[str], top_k: int, filters: Dict[str, Any] | None
+    ) -> List[Tuple[List[Tuple[str, float]], Dict[str, Any], Dict[str, Dict[str, Any]]]]:
         """
-        Query Chroma collection; return list of (id, distance) sorted by ascending distance.
+        Query Chroma once for all queries; per query, return
+        ((id, distance) pairs sorted by ascending distance,
+         id -> embedding map, id -> {document, metadata} map).
+        The caches let MMR and the final payload skip second Chroma round trips.
         NOTE: Don't send empty {} to `where` — pass None/omit instead.
         """
         query_kwargs = dict(
-            query_texts=[query],
+            query_texts=queries,
             n_results=top_k,
             include=["documents", "metadatas", "distances", "embeddings"],  # valid keys only
         )
@@ -189,74 +374,143 @@ class HybridRetrieverV4:
             query_kwargs["where"] = filters  # for metadata filtering
         # (если потребуется фильтровать по тексту, используем where_document=... отдельно)
 
-        result = self._collection.query(**query_kwargs)
-        ids = result.get("ids", [[]])[0]
-        distances = result.get("distances", [[]])[0]
-        return list(zip(ids, distances))
-
-
+        # inference_mode disables autograd tracking for the embedding forward
+        # pass without mutating global state for the host process.
+        if _TORCH is not None:
+            with _TORCH.inference_mode():
+                result = self._collection.query(**query_kwargs)
+        else:
+            result = self._collection.query(**query_kwargs)
+        ids = result.get("ids", [[]])
+        distances = result.get("distances", [[]])
+        embeddings = result.get("embeddings")
+        if embeddings is None:
+            embeddings = [None] * len(ids)
+        documents = result.get("documents") or [None] * len(ids)
+        metadatas = result.get("metadatas") or [None] * len(ids)
+
+        out: List[Tuple[List[Tuple[str, float]], Dict[str, Any], Dict[str, Dict[str, Any]]]] = []
+        for q_ids, q_dists, q_embs, q_docs, q_metas in zip(ids, distances, embeddings, documents, metadatas):
+            pairs = list(zip(q_ids, q_dists))
+            emb_map = dict(zip(q_ids, q_embs)) if q_embs is not None else {}
+            payload_map: Dict[str, Dict[str, Any]] = {}
+            if q_docs is not None and q_metas is not None:
+                for doc_id, doc, meta in zip(q_ids, q_docs, q_metas):
+                    payload_map[doc_id] = {"id": doc_id, "document": doc or "", "metadata": meta or {}}
+            out.append((pairs, emb_map, payload_map))
+        return out
 
     def _sparse_search(self, query: str, top_k: int) -> List[Tuple[str, float]]:
+        """Single-query wrapper around the batched sparse search."""
+        return self._sparse_search_batch([query], top_k=top_k)[0]
+
+    def _sparse_search_batch(self, queries: List[str], top_k: int) -> List[List[Tuple[str, float]]]:
         """
-        BM25s retrieve; return list of (id, bm25_score) sorted by descending score.
+        BM25s retrieve on the whole batch; return per-query lists of
+        (id, bm25_score) sorted by descending score.
         We map bm25's index positions back to Chroma IDs via bm25_meta['ids'].
         """
-        q_tokens = bm25s.tokenize(query)
-        results, scores = self._bm25.retrieve(q_tokens, k=top_k)  # shapes: (1, k)
-        idxs = results[0].tolist() if hasattr(results, "shape") else list(results[0])
-        scs = scores[0].tolist() if hasattr(scores, "shape") else list(scores[0])
-        pairs = [(self._bm25_ids[i], float(s)) for i, s in zip(idxs, scs)]
-        # ensure sorting by score desc (bm25s returns in-order but keep explicit)
-        pairs.sort(key=lambda x: x[1], reverse=True)
-        return pairs
+        q_tokens = bm25s.tokenize(queries)
+        results, scores = self._bm25.retrieve(q_tokens, k=top_k)  # shapes: (B, k)
+        out: List[List[Tuple[str, float]]] = []
+        for row in range(len(queries)):
+            idxs = results[row].tolist() if hasattr(results, "shape") else list(results[row])
+            scs = scores[row].tolist() if hasattr(scores, "shape") else list(scores[row])
+            pairs = [(self._bm25_ids[i], float(s)) for i, s in zip(idxs, scs)]
+            # ensure sorting by score desc (bm25s returns in-order but keep explicit)
+            pairs.sort(key=lambda x: x[1], reverse=True)
+            out.append(pairs)
+        return out
+
+    # ---- Branch-result disk cache ------------------------------------------ #
+    def _bm25_index_fingerprint(self) -> int:
+        """mtime of the BM25 meta file, used as an index version stamp.
+
+        Rebuilding the index rewrites index_meta.json, so folding this into
+        branch-cache keys invalidates every cached branch automatically.
+        """
+        meta_path = os.path.join(os.path.abspath(self.cfg.bm25_dir), self.cfg.bm25_meta_filename)
+        try:
+            return os.stat(meta_path).st_mtime_ns
+        except OSError:
+            return 0
+
+    def _branch_cache_path(self, query: str) -> str:
+        """Content-addressed cache file for one query's branch results.
+
+        The key covers everything the branch results depend on: the query,
+        the Chroma store (path + collection), the candidate pool size, and
+        the index fingerprint — so switching stores or rebuilding the index
+        never replays stale results.
+        """
+        key = hashlib.sha1(
+            f"{query}|{os.path.abspath(self.cfg.chroma_path)}|{self.cfg.chroma_collection}"
+            f"|{self.cfg.candidate_pool}|{self._index_fingerprint}".encode("utf-8")
+        ).hexdigest()
+        return os.path.join(self.cfg.cache_dir, f"{key}.npz")
+
+    def _load_branch_cache(self, path: str):
+        """Return (dense_pairs, emb_map, sparse_pairs) or None on miss."""
+        if not os.path.exists(path):
+            return None
+        try:
+            with np.load(path, allow_pickle=False) as data:
+                dense_ids = data["dense_ids"].tolist()
+                dense = list(zip(dense_ids, data["dense_dists"].tolist()))
+                emb_map = dict(zip(dense_ids, data["dense_embs"]))
+                sparse = list(zip(data["sparse_ids"].tolist(), data["sparse_scores"].tolist()))
+            return dense, emb_map, sparse
+        except Exception:
+            return None  # treat a corrupt/stale file as a miss
+
+    def _save_branch_cache(
+        self,
+        path: str,
+        dense: List[Tuple[str, float]],
+        emb_map: Dict[str, Any],
+        sparse: List[Tuple[str, float]],
+    ) -> None:
+        """Persist branch results; failures never break retrieval."""
+        try:
+            os.makedirs(os.path.dirname(path), exist_ok=True)
+            dense_ids = [i for i, _ in dense]
+            np.savez_compressed(
+                path,
+                dense_ids=np.array(dense_ids, dtype=np.str_),
+                dense_dists=np.array([d for _, d in dense], dtype=np.float32),
+                dense_embs=np.array([emb_map[i] for i in dense_ids], dtype=np.float32),
+                sparse_ids=np.array([i for i, _ in sparse], dtype=np.str_),
+                sparse_scores=np.array([s for _, s in sparse], dtype=np.float32),
+            )
+        except Exception:
+            pass
 
     # ---- Fusion (RRF) and Diversity (MMR) ---------------------------------- #
     @staticmethod
-    def _rrf(scores_by_id: Dict[str, int], k: int) -> Dict[str, float]:
-        """Convert rank positions (1-based) to RRF scores for one ranking list."""
-        return {doc_id: 1.0 / (k + rank) for doc_id, rank in scores_by_id.items()}
-
     def _rrf_fuse(
-        self,
         dense_results: List[Tuple[str, float]],  # (id, distance asc)
         sparse_results: List[Tuple[str, float]], # (id, bm25_score desc)
         k: int,
     ) -> Dict[str, float]:
-        """Reciprocal Rank Fusion over dense & sparse lists."""
-        # Build rank dictionaries (1-based ranks)
-        dense_rank: Dict[str, int] = {}
+        """
+        Reciprocal Rank Fusion over dense & sparse lists in one pass:
+        fused[id] = 1/(k+dense_rank) + 1/(k+sparse_rank). Each branch returns
+        unique ids, so no best-rank deduplication is needed.
+        """
+        fused: Dict[str, float] = {}
         for i, (doc_id, _dist) in enumerate(dense_results, start=1):
-            # if the same id appears multiple times (shouldn't), keep best rank
-            dense_rank[doc_id] = min(i, dense_rank.get(doc_id, i))
-        sparse_rank: Dict[str, int] = {}
+            fused[doc_id] = 1.0 / (k + i)
         for i, (doc_id, _score) in enumerate(sparse_results, start=1):
-            sparse_rank[doc_id] = min(i, sparse_rank.get(doc_id, i))
-
-        # Compute per-list RRF scores
-        dense_rrf = self._rrf(dense_rank, k=k)
-        sparse_rrf = self._rrf(sparse_rank, k=k)
-
-        # Sum them up
-        all_ids = set(dense_rank) | set(sparse_rank)
-        fused: Dict[str, float] = {}
-        for doc_id in all_ids:
-            fused[doc_id] = dense_rrf.get(doc_id, 0.0) + sparse_rrf.get(doc_id, 0.0)
+            fused[doc_id] = fused.get(doc_id, 0.0) + 1.0 / (k + i)
         return fused
 
-    @staticmethod
-    def _cosine_sim_matrix(vecs: np.ndarray) -> np.ndarray:
-        """Compute cosine similarity matrix for (n_docs, dim)."""
-        # Normalize rows to unit vectors
-        norms = np.linalg.norm(vecs, axis=1, keepdims=True) + 1e-12
-        V = vecs / norms
-        return V @ V.T  # (n, n)
-
     def _mmr_select(
         self,
         ranked_ids: List[str],
         rel_scores: Dict[str, float],
         k: int,
         lambda_mult: float,
+        emb_cache: Dict[str, Any] | None = None,
     ) -> List[str]:
         """
         MMR variant using fused relevance scores and doc-doc similarity.
@@ -275,45 +529,66 @@ class HybridRetrieverV4:
         else:
             rel = np.zeros_like(rel)
 
-        # Fetch embeddings for all candidates (in the ranked order)
-        embeddings: List[List[float]] = []
-        for start in range(0, len(ranked_ids), self.cfg.max_get_batch):
-            batch_ids = ranked_ids[start : start + self.cfg.max_get_batch]
-            got = self._collection.get(ids=batch_ids, include=["embeddings"])
-            # Keep order aligned with batch_ids
-            id_to_emb = {i: e for i, e in zip(got.get("ids", []), got.get("embeddings", []))}
-            embeddings.extend([id_to_emb[i] for i in batch_ids])
+        # Resolve embeddings. Fastest path: gather rows from the mmapped
+        # matrix built alongside the BM25 index — a zero-copy source with no
+        # Chroma involvement. Otherwise, prefer the cache from the dense
+        # query; only ids from the sparse branch need a Chroma get().
+        E = None
+        if self._E is not None:
+            rows = [self._id_to_row.get(doc_id, -1) for doc_id in ranked_ids]
+            if min(rows, default=-1) >= 0:
+                E = np.asarray(self._E[rows], dtype=np.float32)
+
+        if E is None:
+            emb_cache = dict(emb_cache) if emb_cache else {}
+            missing = [i for i in ranked_ids if i not in emb_cache]
+            for start in range(0, len(missing), self.cfg.max_get_batch):
+                batch_ids = missing[start : start + self.cfg.max_get_batch]
+                got = self._collection.get(ids=batch_ids, include=["embeddings"])
+                emb_cache.update(zip(got.get("ids", []), got.get("embeddings", [])))
+            try:
+                embeddings = [emb_cache[i] for i in ranked_ids]
+            except KeyError:
+                # Collection returned fewer embeddings than requested
+                return ranked_ids[:k]
+            # fp32 keeps the matmul on the fast SGEMM path and halves bytes moved
+            E = np.asarray(embeddings, dtype=np.float32)
 
-        E = np.array(embeddings, dtype=float)
         if E.ndim != 2 or E.shape[0] != len(ranked_ids):
             # Fallback: if embeddings missing, just return top-k by relevance
             return ranked_ids[:k]
 
-        # Precompute doc-doc cosine similarity matrix
-        sim = self._cosine_sim_matrix(E)
+        # Normalize rows once (skipped when the collection already stores
+        # unit-norm vectors); MMR only ever needs the similarity column of a
+        # newly selected doc, so compute E @ E[idx] on demand (O(n*d) per pick)
+        # instead of the full n x n matrix up front.
+        if not self.cfg.embeddings_are_normalized:
+            norms = np.linalg.norm(E, axis=1, keepdims=True)
+            np.divide(E, np.maximum(norms, 1e-12), out=E)
 
-        selected: List[int] = []
-        candidate_idxs: List[int] = list(range(len(ranked_ids)))
+        n = len(ranked_ids)
 
         # Start with the highest relevance
         first = int(np.argmax(rel))
-        selected.append(first)
-        candidate_idxs.remove(first)
-
-        while len(selected) < min(k, len(ranked_ids)) and candidate_idxs:
-            best_idx = None
-            best_val = -1e9
-            # For each candidate, compute diversity penalty to the already selected set
-            for idx in candidate_idxs:
-                penalty = 0.0
-                if selected:
-                    penalty = float(np.max(sim[idx, selected]))
-                mmr_val = lambda_mult * float(rel[idx]) - (1.0 - lambda_mult) * penalty
-                if mmr_val > best_val:
-                    best_val = mmr_val
-                    best_idx = idx
-            selected.append(best_idx)
-            candidate_idxs.remove(best_idx)
+        selected: List[int] = [first]
+        chosen_mask = np.zeros(n, dtype=bool)
+        chosen_mask[first] = True
+
+        # Running max similarity of every candidate to the selected set:
+        # updated incrementally per pick instead of re-reduced per candidate.
+        max_sim = E @ E[first]
+
+        # Greedy picks as whole-vector ops: score every candidate at once,
+        # exclude already-chosen via -inf, take argmax.
+        for _ in range(min(k, n) - 1):
+            scores = lambda_mult * rel - (1.0 - lambda_mult) * max_sim
+            scores[chosen_mask] = -np.inf
+            nxt = int(np.argmax(scores))
+            if scores[nxt] == -np.inf:
+                break
+            chosen_mask[nxt] = True
+            selected.append(nxt)
+            np.maximum(max_sim, E @ E[nxt], out=max_sim)
 
         return [ranked_ids[i] for i in selected]
 
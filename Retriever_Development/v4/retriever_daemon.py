@@ -0,0 +1,110 @@
+# file: Retriever_Development/v4/retriever_daemon.py
+# -*- coding: utf-8 -*-
+
+# How to run (from project root):
+#   python -m Retriever_Development.v4.retriever_daemon --sock /tmp/retriever_v4.sock
+# Then point clients at it:
+#   RETRIEVER_SOCK=/tmp/retriever_v4.sock python -m Retriever_Development.v4.cli_retrieve_v4 --q "emergency fund"
+
+"""
+Tiny UNIX-domain-socket daemon around HybridRetrieverV4.
+
+Loading the retriever (Chroma open + embedding model) takes seconds; doing it
+once in a long-lived process and serving queries over a socket turns each CLI
+invocation into a thin client with ~ms startup.
+
+Protocol (one request per connection):
+  - Client sends a single JSON line: {"query": "...", "k": 8, "filters": null}
+  - Server replies with one JSON line per hit ({id, score, document, metadata})
+    followed by EOF. Errors come back as a single {"error": "..."} line.
+
+All comments are in English by project policy.
+"""
+
+from __future__ import annotations
+
+import argparse
+import json
+import os
+import socketserver
+from typing import List, Optional
+
+from Retriever_Development.v4.hybrid_retriever_v4 import HybridRetrieverV4, RetrieverConfig
+
+DEFAULT_SOCK = "/tmp/retriever_v4.sock"
+
+# Loaded once in serve(); shared by all handler threads (retrieve is read-only).
+_RETRIEVER: Optional[HybridRetrieverV4] = None
+
+
+class _RetrieveHandler(socketserver.StreamRequestHandler):
+    def handle(self) -> None:
+        try:
+            line = self.rfile.readline()
+            if not line:
+                return
+            req = json.loads(line)
+            query = str(req.get("query", "")).strip()
+            if not query:
+                raise ValueError("Empty 'query' in request.")
+            k = req.get("k")
+            filters = req.get("filters")
+            results = _RETRIEVER.retrieve(
+                query=query,
+                k=int(k) if k else None,
+                filters=filters if isinstance(filters, dict) else None,
+            )
+            for r in results:
+                self.wfile.write(json.dumps(r, ensure_ascii=False).encode("utf-8") + b"\n")
+        except Exception as e:  # report instead of killing the worker thread
+            payload = {"error": f"{type(e).__name__}: {e}"}
+            self.wfile.write(json.dumps(payload, ensure_ascii=False).encode("utf-8") + b"\n")
+
+
+class _DaemonServer(socketserver.ThreadingUnixStreamServer):
+    daemon_threads = True
+    allow_reuse_address = True
+
+
+def serve(sock_path: str, cfg: Optional[RetrieverConfig] = None) -> None:
+    """Load the retriever once and serve queries until interrupted."""
+    global _RETRIEVER
+    _RETRIEVER = HybridRetrieverV4(cfg or RetrieverConfig())
+
+    # Remove a stale socket file from a previous run
+    if os.path.exists(sock_path):
+        os.unlink(sock_path)
+
+    with _DaemonServer(sock_path, _RetrieveHandler) as server:
+        print(f"[OK] Retriever daemon listening on {sock_path} (Ctrl+C to stop)")
+        try:
+            server.serve_forever()
+        except KeyboardInterrupt:
+            pass
+        finally:
+            if os.path.exists(sock_path):
+                os.unlink(sock_path)
+
+
+def build_argparser() -> argparse.ArgumentParser:
+    p = argparse.ArgumentParser(description="UNIX-socket daemon around HybridRetrieverV4.")
+    p.add_argument("--sock", type=str, default=DEFAULT_SOCK,
+                   help=f"Path for the UNIX domain socket (default: {DEFAULT_SOCK}).")
+    p.add_argument("--chroma-path", type=str, default=None)
+    p.add_argument("--collection", type=str, default=None)
+    return p
+
+
+def main(argv: Optional[List[str]] = None) -> int:
+    args = build_argparser().parse_args(argv)
+    cfg = RetrieverConfig()
+    if args.chroma_path:
+        cfg.chroma_path = args.chroma_path
+    if args.collection:
+        cfg.chroma_collection = args.collection
+    serve(args.sock, cfg)
+    return 0
+
+
+if __name__ == "__main__":
+    raise SystemExit(main())
@@ -0,0 +1,38 @@
+# file: llm_integration/_openai_backend.py
+# OpenAI-backed LLM adapter, split out of llm_router so importing the router
+# never touches the openai SDK when backend=local_stub (see llm_router's
+# lazy __getattr__ export).
+
+from __future__ import annotations
+from typing import Optional
+import os
+
+from .llm_router import BaseLLM
+
+
+class OpenAILLM(BaseLLM):
+    def __init__(self, model: str, temperature: float = 0.3, api_key: Optional[str] = None):
+        super().__init__(model=model, temperature=temperature)
+        self._api_key = api_key or os.getenv("OPENAI_API_KEY")
+        self._client = None
+
+    def _ensure_client(self):
+        if self._client is not None:
+            return
+        if not self._api_key:
+            raise RuntimeError("OPENAI_API_KEY is missing. Set it in your environment.")
+        # Lazy import to avoid dependency during local_stub use.
+        from openai import OpenAI
+        self._client = OpenAI(api_key=self._api_key)
+
+    def complete(self, system_prompt: str, user_prompt: str) -> str:
+        self._ensure_client()
+        resp = self._client.chat.completions.create(
+            model=self.model,  # e.g., "gpt-5-mini" for MVP
+            temperature=self.temperature,
+            messages=[
+                {"role": "system", "content": system_prompt},
+                {"role": "user", "content": user_prompt},
+            ],
+        )
+        return (resp.choices[0].message.content or "").strip()
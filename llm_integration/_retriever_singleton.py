@@ -0,0 +1,29 @@
+# file: llm_integration/_retriever_singleton.py
+# Process-wide retriever singleton shared by every bridge module, so the
+# BM25 index + Chroma collection are loaded at most once per process no
+# matter how many adapters import it.
+
+from __future__ import annotations
+from functools import lru_cache
+
+from Retriever_Development.v4.hybrid_retriever_v4 import (
+    HybridRetrieverV4,
+    RetrieverConfig,
+)
+
+
+@lru_cache(maxsize=1)
+def get_retriever() -> HybridRetrieverV4:
+    """Create the retriever once and cache it (avoids reloading BM25/Chroma).
+
+    No config parameter on purpose: RetrieverConfig is an unhashable mutable
+    dataclass, so accepting it would break lru_cache (and let the "singleton"
+    balloon past one entry). Build differently-configured retrievers directly
+    from HybridRetrieverV4 instead.
+    """
+    return HybridRetrieverV4(RetrieverConfig())
+
+
+def reset_retriever() -> None:
+    """Drop the cached retriever (for tests or after reindexing)."""
+    get_retriever.cache_clear()
@@ -4,7 +4,9 @@
 
 from __future__ import annotations
 import os
-from typing import Dict, Iterable, List
+from concurrent.futures import ThreadPoolExecutor
+from functools import lru_cache
+from typing import Dict, List, Tuple
 
 from .llm_router import get_llm
 from .config_loader import get_generator_cfg
@@ -18,27 +20,37 @@ MAX_CONTEXT_TOKENS: int = int(_GEN.get("max_context_tokens", 900))
 TOKEN_ENCODING: str = str(_GEN.get("token_encoding", "cl100k_base"))
 USE_SANITIZER: bool = bool(_GEN.get("use_sanitizer", True))
 USE_TOKEN_CAP: bool = bool(_GEN.get("use_token_cap", True))
+# Optional total prompt budget (system + scaffold + question + context).
+# 0 disables it and keeps the plain per-context cap above.
+MAX_PROMPT_TOKENS: int = int(_GEN.get("max_prompt_tokens", 0))
+
+# Loaded system prompts keyed by path; value is (mtime_ns, size, text).
+_PROMPT_CACHE: Dict[str, tuple] = {}
 
 def load_system_prompt(path: str = PROMPT_PATH) -> str:
-    """Load the system prompt from a text file."""
-    if not os.path.exists(path):
+    """Load the system prompt from a text file (cached until the file changes)."""
+    try:
+        st = os.stat(path)
+    except OSError:
         raise FileNotFoundError(f"System prompt file not found: {path}")
-    with open(path, "r", encoding="utf-8") as f:
-        return f.read().strip()
-
-def _dedupe_keep_order(lines: Iterable[str]) -> List[str]:
-    """Remove exact-duplicate lines while preserving order."""
-    seen = set()
-    out: List[str] = []
-    for ln in lines:
-        key = ln.strip()
-        if not key:
-            continue
-        if key in seen:
-            continue
-        seen.add(key)
-        out.append(ln)
-    return out
+    key = (st.st_mtime_ns, st.st_size)
+    hit = _PROMPT_CACHE.get(path)
+    if hit is not None and hit[:2] == key:
+        return hit[2]
+    # EAFP raw read: the stat above already gives the size, so read the whole
+    # file in one os.read and decode once, skipping the text-IO codec/buffer
+    # stack. Errors still surface as the same friendly FileNotFoundError.
+    try:
+        fd = os.open(path, os.O_RDONLY)
+        try:
+            data = os.read(fd, st.st_size)
+        finally:
+            os.close(fd)
+    except OSError as e:
+        raise FileNotFoundError(f"System prompt file not found: {path}") from e
+    text = data.decode("utf-8").strip()
+    _PROMPT_CACHE[path] = (st.st_mtime_ns, st.st_size, text)
+    return text
 
 def sanitize_context(raw_context: str, max_chars: int = MAX_CONTEXT_CHARS) -> str:
     """
@@ -47,16 +59,55 @@ def sanitize_context(raw_context: str, max_chars: int = MAX_CONTEXT_CHARS) -> st
     - Trim whitespace.
     - Hard-cap by characters to keep the prompt budget reasonable.
     """
-    parts = [p.strip() for p in (raw_context or "").split("\n\n")]
-    parts = [p for p in parts if p]  # drop empties
-    parts = _dedupe_keep_order(parts)
-
-    text = "\n\n".join(parts).strip()
-    if len(text) > max_chars:
-        # Cut on paragraph boundary if possible
-        cut = text[:max_chars]
-        text = (cut.rsplit("\n\n", 1)[0] or cut).strip()
-    return text
+    raw = raw_context or ""
+
+    # Fast path: contexts already under the cap take the one-shot pipeline —
+    # strip, drop empties, dedupe order-preserving via dict keys (fastest
+    # deterministic dedup in CPython; insertion order is guaranteed).
+    if len(raw) <= max_chars:
+        parts = dict.fromkeys(
+            p for p in (s.strip() for s in raw.split("\n\n")) if p
+        )
+        return "\n\n".join(parts).strip()
+
+    # Oversized contexts: bounded find("\n\n") scan that stops as soon as the
+    # kept text reaches max_chars, instead of materializing every paragraph
+    # only to discard the tail. Work done is O(max_chars), not O(len(raw)),
+    # and the cut always lands on a paragraph boundary.
+    parts: Dict[str, None] = {}
+    pos = 0
+    total = 0
+    L = len(raw)
+    while True:
+        nxt = raw.find("\n\n", pos)
+        end = nxt if nxt >= 0 else L
+        chunk = raw[pos:end].strip()
+        if chunk and chunk not in parts:
+            projected = total + (2 if parts else 0) + len(chunk)
+            if projected > max_chars:
+                if not parts:
+                    # Single paragraph larger than the cap: hard character cut
+                    return chunk[:max_chars].strip()
+                break
+            parts[chunk] = None
+            total = projected
+        if nxt < 0:
+            break
+        pos = nxt + 2
+    return "\n\n".join(parts)
+
+@lru_cache(maxsize=8)
+def _get_enc(encoding_name: str):
+    """
+    Build a tiktoken encoder once per encoding name. get_encoding() walks the
+    registry (and may touch disk) on every call, so cache the encoder object.
+    Returns None when tiktoken is unavailable.
+    """
+    try:
+        import tiktoken  # type: ignore
+        return tiktoken.get_encoding(encoding_name)
+    except Exception:
+        return None
 
 def _trim_to_tokens(text: str, max_tokens: int, encoding_name: str = TOKEN_ENCODING) -> str:
     """
@@ -65,41 +116,122 @@ def _trim_to_tokens(text: str, max_tokens: int, encoding_name: str = TOKEN_ENCOD
     """
     if max_tokens <= 0 or not text:
         return ""
+    # Cheap under-budget shortcut before touching the tokenizer: every
+    # token spans at least 1 char, so this can never exceed the cap.
+    if len(text) <= max_tokens:
+        return text
+    enc = _get_enc(encoding_name)
+    if enc is not None:
+        try:
+            # Count-only fast path (Rust-backed tiktoken builds): no token
+            # list is materialized when the text is already under budget.
+            count = getattr(enc, "count", None)
+            if count is not None and count(text) <= max_tokens:
+                return text
+            # encode_ordinary skips special-token scanning, which is all we
+            # need here — the context is plain retrieved text.
+            ids = enc.encode_ordinary(text)
+            if len(ids) <= max_tokens:
+                return text
+            return enc.decode(ids[:max_tokens])
+        except Exception:
+            pass  # fall through to the approximate path
+    # Fallback: 1 word ≈ 1 token (rough but safe)
+    words = text.split()
+    if len(words) <= max_tokens:
+        return text
+    return " ".join(words[:max_tokens])
+
+def _trim_batch(
+    texts: List[str],
+    max_tokens: int = MAX_CONTEXT_TOKENS,
+    encoding_name: str = TOKEN_ENCODING,
+) -> List[str]:
+    """
+    Token-cap many texts in one call. Uses tiktoken's multi-threaded
+    encode_ordinary_batch so N contexts tokenize across cores instead of
+    serially; falls back to per-text _trim_to_tokens when unavailable.
+    """
+    if max_tokens <= 0:
+        return ["" for _ in texts]
+    enc = _get_enc(encoding_name)
+    if enc is not None:
+        try:
+            ids_lists = enc.encode_ordinary_batch(
+                list(texts), num_threads=os.cpu_count() or 4
+            )
+            return [
+                text if len(ids) <= max_tokens else enc.decode(ids[:max_tokens])
+                for text, ids in zip(texts, ids_lists)
+            ]
+        except Exception:
+            pass  # fall through to the per-text path
+    return [_trim_to_tokens(t, max_tokens, encoding_name) for t in texts]
+
+# Constant prompt scaffolding, built once at import instead of re-created
+# inside every f-string in generate_answer.
+_USER_HEAD = "User question:\n"
+_CTX_HEAD = "\n\nRelevant context (do NOT mention its origin in the answer):\n"
+_FOOT = "\n\nNow answer following the system instructions."
+
+def _build_user_prompt(question: str, capped_context: str) -> str:
+    """Assemble the user prompt from the constant scaffold fragments."""
+    return f"{_USER_HEAD}{question}{_CTX_HEAD}{capped_context}{_FOOT}"
+
+@lru_cache(maxsize=4)
+def _fixed_prompt_tokens(encoding_name: str = TOKEN_ENCODING) -> int:
+    """
+    Token count of the fixed prompt prefix: system prompt + the constant
+    scaffold fragments. Encoded once per encoding (the prompt file is stable
+    for a process lifetime), so per-request budget arithmetic is a subtraction
+    instead of re-encoding hundreds of fixed tokens every call.
+    Returns 0 when tiktoken or the prompt file is unavailable.
+    """
+    enc = _get_enc(encoding_name)
+    if enc is None:
+        return 0
     try:
-        import tiktoken  # type: ignore
-        enc = tiktoken.get_encoding(encoding_name)
-        ids = enc.encode(text)
-        if len(ids) <= max_tokens:
-            return text
-        return enc.decode(ids[:max_tokens])
+        fixed = f"{load_system_prompt()}\n\n{_USER_HEAD}{_CTX_HEAD}{_FOOT}"
+        return len(enc.encode_ordinary(fixed))
     except Exception:
-        # Fallback: 1 word ≈ 1 token (rough but safe)
-        words = text.split()
-        if len(words) <= max_tokens:
-            return text
-        return " ".join(words[:max_tokens])
+        return 0
 
-def generate_answer(context: str, question: str) -> Dict[str, object]:
+# Small worker pool for CPU-side prompt preparation (sanitize + token cap).
+# Batched callers can overlap turn N+1's tokenization with turn N's LLM
+# network round trip; a single question just runs on the worker thread.
+_PREP_POOL = ThreadPoolExecutor(max_workers=2)
+
+def _prepare(context: str, question: str) -> Tuple[str, str]:
+    """Sanitize + token-cap the context and build the user prompt."""
+    clean_context = sanitize_context(context, max_chars=MAX_CONTEXT_CHARS) if USE_SANITIZER else (context or "")
+    ctx_budget = MAX_CONTEXT_TOKENS
+    if MAX_PROMPT_TOKENS > 0:
+        # Total-budget mode: context gets whatever remains after the
+        # pre-encoded fixed prefix and the (small) question.
+        question_tokens = max(1, len(question) // 2)  # pessimistic, avoids an encode
+        remaining = MAX_PROMPT_TOKENS - _fixed_prompt_tokens() - question_tokens
+        ctx_budget = min(ctx_budget, max(0, remaining))
+    capped_context = _trim_to_tokens(clean_context, max_tokens=ctx_budget, encoding_name=TOKEN_ENCODING) if USE_TOKEN_CAP else clean_context
+    return capped_context, _build_user_prompt(question, capped_context)
+
+def generate_answer(context: str, question: str, debug: bool = False, llm=None) -> Dict[str, object]:
     """
     Generate answer using the selected LLM (configured via model.config.json / env).
     On errors, return a friendly fallback for the end user and include diagnostics
-    in 'developer_output'.
+    in 'developer_output'. The multi-KB full_prompt echo is only built when
+    `debug` is True (cli_ask passes --show-dev through here). Callers that
+    already hold a router LLM can pass it via `llm` to skip a second lookup.
     """
-    llm = get_llm()  # central router (local_stub or openai)
-    system_prompt = load_system_prompt()
+    # Kick prompt preparation (sanitize + token cap) off to the worker pool,
+    # then do router/prompt loading on this thread while it runs.
+    prep_future = _PREP_POOL.submit(_prepare, context, question)
 
-    # 1) Optional sanitizer (char cap + dedupe)
-    clean_context = sanitize_context(context, max_chars=MAX_CONTEXT_CHARS) if USE_SANITIZER else (context or "")
-
-    # 2) Optional token cap
-    capped_context = _trim_to_tokens(clean_context, max_tokens=MAX_CONTEXT_TOKENS, encoding_name=TOKEN_ENCODING) if USE_TOKEN_CAP else clean_context
+    if llm is None:
+        llm = get_llm()  # central router (local_stub or openai)
+    system_prompt = load_system_prompt()
 
-    # 3) Build user prompt (keep sources hidden; pass only plain context)
-    user_prompt = (
-        f"User question:\n{question}\n\n"
-        f"Relevant context (do NOT mention its origin in the answer):\n{capped_context}\n\n"
-        "Now answer following the system instructions."
-    )
+    # Block only right before the LLM call needs the prepared prompt.
+    capped_context, user_prompt = prep_future.result()
 
     # 4) Call LLM with basic error handling
     try:
@@ -108,7 +240,7 @@ def generate_answer(context: str, question: str) -> Dict[str, object]:
             "final_output": answer_text,
             "developer_output": {
                 "context_used": capped_context,
-                "full_prompt": f"{system_prompt}\n\n{user_prompt}",
+                "full_prompt": f"{system_prompt}\n\n{user_prompt}" if debug else None,
                 "limits": {
                     "use_sanitizer": USE_SANITIZER,
                     "use_token_cap": USE_TOKEN_CAP,
@@ -131,7 +263,7 @@ def generate_answer(context: str, question: str) -> Dict[str, object]:
             "developer_output": {
                 "error": {"type": "RuntimeError", "message": msg},
                 "context_used": capped_context,
-                "full_prompt": f"{system_prompt}\n\n{user_prompt}",
+                "full_prompt": f"{system_prompt}\n\n{user_prompt}" if debug else None,
             },
         }
     except Exception as e:
@@ -140,6 +272,6 @@ def generate_answer(context: str, question: str) -> Dict[str, object]:
             "developer_output": {
                 "error": {"type": type(e).__name__, "message": str(e)},
                 "context_used": capped_context,
-                "full_prompt": f"{system_prompt}\n\n{user_prompt}",
+                "full_prompt": f"{system_prompt}\n\n{user_prompt}" if debug else None,
             },
         }
@@ -17,24 +17,32 @@
 
 from __future__ import annotations
 import argparse, json
+from dataclasses import asdict
 from typing import Dict
 from .retriever_bridge import retrieve_context
-from .answer_generator import generate_answer
+from .answer_generator import generate_answer, _trim_batch
 from .llm_router import get_llm
 from .run_logger import log_phase4_run
 
 def main() -> None:
     parser = argparse.ArgumentParser(description="Ask the RAG assistant (Phase 4).")
-    parser.add_argument("--q", "--query", dest="query", required=True, help="User question")
+    parser.add_argument("--q", "--query", dest="query", help="User question")
     parser.add_argument("--k", type=int, default=5, help="Top-k chunks to use after filtering")
+    parser.add_argument("--batch", help="JSONL file with one {\"question\": ...} per line")
     parser.add_argument("--show-dev", action="store_true", help="Print developer metadata")
     args = parser.parse_args()
 
+    if args.batch:
+        _run_batch(args)
+        return
+    if not args.query:
+        parser.error("either --q or --batch is required")
+
     # 1) Retrieve context and refs
     context_text, refs = retrieve_context(args.query, k=args.k)
 
-    # 2) Generate answer
-    result: Dict[str, object] = generate_answer(context_text, args.query)
+    # 2) Generate answer (full_prompt echo only when dev output is requested)
+    result: Dict[str, object] = generate_answer(context_text, args.query, debug=args.show_dev)
 
     # 3) Log run
     llm = get_llm()
@@ -54,10 +62,47 @@ def main() -> None:
     if args.show_dev:
         print("\n=== Developer Output ===")
         dev = {
-            "refs": refs,
+            "refs": [asdict(r) for r in refs],
             "llm_debug": result["developer_output"],
         }
         print(json.dumps(dev, ensure_ascii=False, indent=2))
 
+def _run_batch(args) -> None:
+    """Answer every question from a JSONL file ({"question": ...} per line).
+    Contexts are token-capped together in one multi-threaded tiktoken call;
+    generate_answer's own cap then hits its under-budget fast path."""
+    with open(args.batch, "r", encoding="utf-8") as f:
+        questions = []
+        for line in f:
+            line = line.strip()
+            if not line:
+                continue
+            obj = json.loads(line)
+            q = str(obj.get("question") or obj.get("q") or "").strip()
+            if q:
+                questions.append(q)
+
+    retrieved = [retrieve_context(q, k=args.k) for q in questions]
+    capped_contexts = _trim_batch([ctx for ctx, _refs in retrieved])
+
+    llm = get_llm()
+    model_name = getattr(llm, "model", "unknown-model")
+    for q, (_ctx, refs), capped in zip(questions, retrieved, capped_contexts):
+        result = generate_answer(capped, q, debug=args.show_dev)
+        log_phase4_run(
+            model_name=model_name,
+            question=q,
+            context_text=capped,
+            refs=refs,
+            answer_text=str(result.get("final_output", "")),
+        )
+        print(f"\n=== Question ===\n{q}")
+        print("\n=== Final Answer ===")
+        print(result["final_output"])
+        if args.show_dev:
+            print("\n=== Developer Output ===")
+            dev = {"refs": [asdict(r) for r in refs], "llm_debug": result["developer_output"]}
+            print(json.dumps(dev, ensure_ascii=False, indent=2))
+
 if __name__ == "__main__":
     main()
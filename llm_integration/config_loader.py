@@ -41,18 +41,31 @@ def _deep_merge(dst: Dict[str, Any], src: Dict[str, Any]) -> Dict[str, Any]:
             out[k] = v
     return out
 
+# Parsed configs keyed by path; value is (mtime_ns, size, merged_cfg).
+# Every accessor re-parsed the JSON before; now unchanged files cost one stat.
+_CFG_CACHE: Dict[str, tuple] = {}
+
 def load_rag_config(path: str = "configs/rag_config.json") -> Dict[str, Any]:
-    """Load JSON config and merge over defaults. Missing/invalid file → defaults."""
+    """Load JSON config and merge over defaults. Missing/invalid file → defaults.
+    The merged result is cached by (mtime_ns, size) until the file changes."""
+    try:
+        st = os.stat(path)
+    except OSError:
+        return dict(_DEFAULTS)
+    key = (st.st_mtime_ns, st.st_size)
+    hit = _CFG_CACHE.get(path)
+    if hit is not None and hit[:2] == key:
+        return hit[2]
     cfg = dict(_DEFAULTS)
     try:
-        if os.path.exists(path):
-            with open(path, "r", encoding="utf-8") as f:
-                user_cfg = json.load(f)
-            if isinstance(user_cfg, dict):
-                cfg = _deep_merge(cfg, user_cfg)
+        with open(path, "r", encoding="utf-8") as f:
+            user_cfg = json.load(f)
+        if isinstance(user_cfg, dict):
+            cfg = _deep_merge(cfg, user_cfg)
     except Exception:
         # Fail-safe: return defaults if file is malformed
         cfg = dict(_DEFAULTS)
+    _CFG_CACHE[path] = (st.st_mtime_ns, st.st_size, cfg)
     return cfg
 
 def get_retriever_cfg(path: str = "configs/rag_config.json") -> Dict[str, Any]:
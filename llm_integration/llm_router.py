@@ -22,8 +22,12 @@
 # answer = llm.complete(system_prompt, user_prompt)
 
 from __future__ import annotations
-from typing import Optional, Dict, Any
-import os, json, importlib
+from functools import lru_cache
+from typing import TYPE_CHECKING, Optional, Dict, Any
+import os, json
+
+if TYPE_CHECKING:  # pragma: no cover - import for type checkers/IDEs only
+    from ._openai_backend import OpenAILLM
 
 # ---------- Base interface ----------
 
@@ -49,34 +53,16 @@ class LocalStubLLM(BaseLLM):
                 "Note: Switch to OpenAI by changing model.config.json or env vars."
             )
 
-# ---------- OpenAI backend ----------
-
-class OpenAILLM(BaseLLM):
-    def __init__(self, model: str, temperature: float = 0.3, api_key: Optional[str] = None):
-        super().__init__(model=model, temperature=temperature)
-        self._api_key = api_key or os.getenv("OPENAI_API_KEY")
-        self._client = None
+# ---------- OpenAI backend (lazy) ----------
+# OpenAILLM lives in _openai_backend.py so that importing the router in
+# local_stub mode never resolves any part of the openai SDK; the class is
+# still reachable as llm_router.OpenAILLM via the module __getattr__ below.
 
-    def _ensure_client(self):
-        if self._client is not None:
-            return
-        if not self._api_key:
-            raise RuntimeError("OPENAI_API_KEY is missing. Set it in your environment.")
-        # Lazy import to avoid dependency during local_stub use.
-        from openai import OpenAI
-        self._client = OpenAI(api_key=self._api_key)
-
-    def complete(self, system_prompt: str, user_prompt: str) -> str:
-        self._ensure_client()
-        resp = self._client.chat.completions.create(
-            model=self.model,  # e.g., "gpt-5-mini" for MVP
-            temperature=self.temperature,
-            messages=[
-                {"role": "system", "content": system_prompt},
-                {"role": "user", "content": user_prompt},
-            ],
-        )
-        return (resp.choices[0].message.content or "").strip()
+def __getattr__(name: str):
+    if name == "OpenAILLM":
+        from ._openai_backend import OpenAILLM
+        return OpenAILLM
+    raise AttributeError(f"module {__name__!r} has no attribute {name!r}")
 
 # ---------- Factory & config loading ----------
 
@@ -98,22 +84,39 @@ def _normalize_model_name(backend: str, model: str) -> str:
         return aliases.get(model, model)
     return model
 
+# Parsed model configs keyed by (path, mtime_ns); repeat get_llm calls (or
+# cache invalidations) skip the JSON re-parse while file edits still apply.
+_CFG_CACHE: Dict[Any, Dict[str, Any]] = {}
+
 def _read_file_config(path: Optional[str]) -> Dict[str, Any]:
     if not path:
         return {}
+    try:
+        st = os.stat(path)
+    except OSError:
+        return {}
+    key = (path, st.st_mtime_ns)
+    cached = _CFG_CACHE.get(key)
+    if cached is not None:
+        return cached
     try:
         with open(path, "r", encoding="utf-8") as f:
-            return json.load(f)
+            cfg = json.load(f)
     except FileNotFoundError:
         return {}
     except Exception as e:
         raise RuntimeError(f"Failed to read '{path}': {e}")
+    _CFG_CACHE[key] = cfg
+    return cfg
 
+@lru_cache(maxsize=4)
 def get_llm(config_path: Optional[str] = "model.config.json") -> BaseLLM:
     """
     Central entry point for the pipeline.
     1) Load defaults → overlay file config → overlay env vars.
     2) Instantiate backend client with a uniform interface.
+    Memoized per config_path: repeat calls skip the config re-parse and reuse
+    the same backend object (and its HTTP client, for OpenAI).
     """
     cfg = {**DEFAULTS, **_read_file_config(config_path)}
     # Environment overrides (keep lower-case for backend)
@@ -125,9 +128,22 @@ def get_llm(config_path: Optional[str] = "model.config.json") -> BaseLLM:
     if backend == "local_stub":
         return LocalStubLLM(model=model, temperature=temperature)
     if backend == "openai":
-        return OpenAILLM(model=model, temperature=temperature)
+        from ._openai_backend import OpenAILLM
+        llm = OpenAILLM(model=model, temperature=temperature)
+        # Opt-in prewarm: build the HTTP client (TLS/DNS setup) off the first
+        # request's critical path. Gated by env so tests stay cheap.
+        if os.getenv("LLM_PREWARM") == "1":
+            try:
+                llm._ensure_client()
+            except Exception:
+                pass  # missing key etc. surfaces on the first complete() as before
+        return llm
     raise ValueError(f"Unsupported backend: {backend}")
 
+def invalidate_llm_cache() -> None:
+    """Drop memoized LLMs (for tests or after config/env changes)."""
+    get_llm.cache_clear()
+
 # ---------- Minimal self-test (optional) ----------
 if __name__ == "__main__":
     # Example usage. In production, your pipeline will import get_llm() instead.
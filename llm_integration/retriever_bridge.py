@@ -5,33 +5,51 @@
 # Parameterized by configs/rag_config.json via config_loader, including off-switch flags.
 
 from __future__ import annotations
+from dataclasses import dataclass, replace
 from typing import Dict, List, Tuple, Optional
 from functools import lru_cache
 
-# Phase 3 retriever (adjust path if your project structure differs)
-from Retriever_Development.v4.hybrid_retriever_v4 import (
-    HybridRetrieverV4,
-    RetrieverConfig,
-)
+# Process-wide retriever singleton (shared with any other bridge/adapters)
+from ._retriever_singleton import get_retriever as _get_retriever
 
 # RAG config (retriever section)
 from .config_loader import get_retriever_cfg
 
-# ---- Load retriever config (with safe defaults) ----
-_RCFG = get_retriever_cfg()  # {"k_default", "max_per_chapter", "exclude_chapters", "use_filters", "use_per_chapter_cap"}
+@dataclass(slots=True)
+class SourceRef:
+    """Developer-facing reference for one retrieved chunk (safe scalars only).
+    Slots keep per-record memory a fraction of an equivalent dict, which adds
+    up when hundreds of runs are logged to runs_history.jsonl."""
+    id: Optional[str]
+    score: float
+    chapter: Optional[str]
+    position: Optional[int]
+    category: Optional[str]
+    source_id: Optional[str]
+    preview: str
 
-K_DEFAULT: int = int(_RCFG.get("k_default", 5))
-MAX_PER_CHAPTER: int = int(_RCFG.get("max_per_chapter", 2))
-EXCLUDE_CHAPTERS = set(_RCFG.get("exclude_chapters", []))
-USE_FILTERS: bool = bool(_RCFG.get("use_filters", True))
-USE_PER_CHAPTER_CAP: bool = bool(_RCFG.get("use_per_chapter_cap", True))
+# ---- Retriever config (with safe defaults), read lazily on first use ----
+# Deferred behind lru_cache so importing this module never triggers the
+# config JSON parse for code paths that don't retrieve.
 
 @lru_cache(maxsize=1)
-def _get_retriever(cfg: Optional[RetrieverConfig] = None) -> HybridRetrieverV4:
-    """Create the retriever once and cache it (avoids reloading BM25/Chroma)."""
-    return HybridRetrieverV4(cfg or RetrieverConfig())
+def _cfg():
+    """(k_default, max_per_chapter, exclude_chapters, use_filters,
+    use_per_chapter_cap, overshoot_factor) from the retriever config section.
+    overshoot_factor controls how many extra candidates to pull before
+    post-filtering (k_eff * factor); well-behaved corpora can lower it
+    toward 1.5 to shrink retriever work."""
+    r = get_retriever_cfg()
+    return (
+        int(r.get("k_default", 5)),
+        int(r.get("max_per_chapter", 2)),
+        frozenset(r.get("exclude_chapters", [])),
+        bool(r.get("use_filters", True)),
+        bool(r.get("use_per_chapter_cap", True)),
+        float(r.get("overshoot_factor", 3)),
+    )
 
-def retrieve_context(question: str, k: Optional[int] = None) -> Tuple[str, List[Dict]]:
+def retrieve_context(question: str, k: Optional[int] = None) -> Tuple[str, List[SourceRef]]:
     """
     Run the hybrid retriever and return (context_text, source_refs).
     Post-filtering (configurable via rag_config.json):
@@ -40,62 +58,73 @@ def retrieve_context(question: str, k: Optional[int] = None) -> Tuple[str, List[
       - cap max items per chapter if USE_PER_CHAPTER_CAP = True,
       - keep top-k items (k from arg or config),
       - build a compact plain-text context for the LLM.
+    Results are memoized per (question, k_eff); repeated identical questions
+    (chat retries, eval loops) become a dict lookup instead of a full hybrid
+    retrieval. Use retrieve_context.cache_clear() after reindexing.
     """
+    # Normalize k here so k=None and k=default share one cache entry.
+    k_eff = int(k) if isinstance(k, int) and k > 0 else _cfg()[0]
+    context_text, refs = _retrieve_context_cached(question, k_eff)
+    # Shallow-copy the refs so callers mutating them can't corrupt the cache.
+    return context_text, [replace(r) for r in refs]
+
+@lru_cache(maxsize=128)
+def _retrieve_context_cached(question: str, k_eff: int) -> Tuple[str, List[SourceRef]]:
     retriever = _get_retriever()
+    _k_default, max_per, exclude, use_filters, use_cap, overshoot = _cfg()
 
-    # Effective k and pull a bit more to allow filtering/diversity
-    k_eff = int(k) if isinstance(k, int) and k > 0 else K_DEFAULT
-    raw: List[Dict] = retriever.retrieve(question, k=max(k_eff * 3, k_eff))
+    # Pull a bit more than k to allow filtering/diversity
+    raw: List[Dict] = retriever.retrieve(question, k=max(int(k_eff * overshoot), k_eff))
 
-    # 1) Drop excluded chapters and deduplicate by id (preserve order)
+    # 1-3) Single pass (preserve order): compute the chapter once per item,
+    # then apply exclude filter, id dedup, and the per-chapter cap together.
+    # (item, chapter) tuples are kept so the ref-build below reuses the
+    # chapter string instead of redoing the triple metadata lookup.
+    # Config values are already locals (unpacked from _cfg() above), so the
+    # loop body uses LOAD_FAST instead of module-global lookups per item.
     seen_ids = set()
-    prelim: List[Dict] = []
+    per_chapter_count: Dict[str, int] = {}
+    filtered: List[Tuple[Dict, str]] = []
     for item in raw:
         meta = item.get("metadata") or {}
         chapter = (meta.get("chapter_title") or meta.get("chapter") or meta.get("chapter_name") or "").strip()
         doc_id = item.get("id")
-        if USE_FILTERS and chapter in EXCLUDE_CHAPTERS:
+        if use_filters and chapter in exclude:
             continue
         if doc_id in seen_ids:
             continue
-        seen_ids.add(doc_id)
-        prelim.append(item)
-
-    # 2) Cap per chapter to improve diversity (preserve order)
-    per_chapter_count: Dict[str, int] = {}
-    filtered: List[Dict] = []
-    for item in prelim:
-        meta = item.get("metadata") or {}
-        chapter = (meta.get("chapter_title") or meta.get("chapter") or meta.get("chapter_name") or "_unknown_").strip()
-        cnt = per_chapter_count.get(chapter, 0)
-        if USE_PER_CHAPTER_CAP and cnt >= MAX_PER_CHAPTER:
+        cnt = per_chapter_count.get(chapter or "_unknown_", 0)
+        if use_cap and cnt >= max_per:
             continue
-        per_chapter_count[chapter] = cnt + 1
-        filtered.append(item)
-
-    # 3) Keep top-k after filtering (preserve order)
-    filtered = filtered[:k_eff]
+        seen_ids.add(doc_id)
+        per_chapter_count[chapter or "_unknown_"] = cnt + 1
+        filtered.append((item, chapter))
+        # Top-k reached: skip the rest of the overshoot pool entirely
+        if len(filtered) >= k_eff:
+            break
 
-    # 4) Build compact context for the LLM (plain text only)
+    # 4+5) One loop builds both the LLM context and the developer refs:
+    # each item/meta is read once and the stripped document is reused for
+    # the 200-char preview instead of stripping again.
     texts: List[str] = []
-    for item in filtered:
-        txt = (item.get("document") or "").strip()
-        if txt:
-            texts.append(txt)
-    context_text = "\n\n".join(texts)
-
-    # 5) Developer-facing references (safe scalar fields only)
-    refs: List[Dict] = []
-    for item in filtered:
+    refs: List[SourceRef] = []
+    for item, chapter in filtered:
+        doc = (item.get("document") or "").strip()
+        if doc:
+            texts.append(doc)
         meta = item.get("metadata") or {}
-        refs.append({
-            "id": item.get("id"),
-            "score": float(item.get("score", 0.0)),
-            "chapter": (meta.get("chapter_title") or meta.get("chapter") or meta.get("chapter_name")),
-            "position": meta.get("position"),
-            "category": meta.get("category"),
-            "source_id": meta.get("source_id"),
-            "preview": (item.get("document") or "").strip()[:200],
-        })
+        refs.append(SourceRef(
+            id=item.get("id"),
+            score=float(item.get("score", 0.0)),
+            chapter=chapter or None,
+            position=meta.get("position"),
+            category=meta.get("category"),
+            source_id=meta.get("source_id"),
+            preview=doc[:200],
+        ))
+    context_text = "\n\n".join(texts)
 
     return context_text, refs
+
+# Expose cache control on the public wrapper for tests and reindex scripts.
+retrieve_context.cache_clear = _retrieve_context_cached.cache_clear  # type: ignore[attr-defined]
@@ -4,6 +4,7 @@
 # - Optionally appends every run to runs_history.jsonl (controlled via configs/rag_config.json)
 
 from __future__ import annotations
+import atexit
 import json
 import os
 import time
@@ -11,6 +12,12 @@ from typing import Any, Dict, List
 
 from .config_loader import get_logging_cfg
 
+# Optional orjson for faster JSON serialization; stdlib fallback otherwise.
+try:
+    import orjson  # type: ignore
+except Exception:  # pragma: no cover - orjson is optional
+    orjson = None
+
 # ---- Load logging config (with safe defaults) ----
 _LOG = get_logging_cfg()
 RUNS_DIR = _LOG.get("runs_dir", "artifacts/v4/runs")
@@ -18,31 +25,68 @@ LAST_RUN_FILE = os.path.join(RUNS_DIR, "last_run_phase4.json")
 
 HISTORY_FILE_NAME = _LOG.get("history_file", "runs_history.jsonl")
 ENABLE_HISTORY = bool(_LOG.get("enable_history", True))
+# Compact JSON by default for the machine-read last-run file; set
+# logging.pretty=true in rag_config.json to restore indented output.
+PRETTY_LAST_RUN = bool(_LOG.get("pretty", False))
 HISTORY_PATH = os.path.join(RUNS_DIR, HISTORY_FILE_NAME)
 
 def _ensure_dir(path: str) -> None:
     os.makedirs(path, exist_ok=True)
 
-def _shallow_refs(refs: List[Dict[str, Any]], max_len: int = 50) -> List[Dict[str, Any]]:
-    """Keep only safe, short fields for logging."""
-    out: List[Dict[str, Any]] = []
-    for r in refs or []:
-        out.append({
-            "id": r.get("id"),
-            "chapter": r.get("chapter"),
-            "position": r.get("position"),
-            "score": r.get("score"),
-            "preview": (r.get("preview") or "")[:max_len]
-        })
+def _shallow_refs(refs: List[Any], max_len: int = 50) -> List[Dict[str, Any]]:
+    """Keep only safe, short fields for logging.
+    Accepts retriever_bridge.SourceRef records (attribute access) as well as
+    plain dicts from older callers."""
+    refs = refs or []
+    # Pre-sized list with index assignment: skips append's grow/amortization
+    # in this per-call log path.
+    out: List[Dict[str, Any]] = [None] * len(refs)  # type: ignore[list-item]
+    for i, r in enumerate(refs):
+        if isinstance(r, dict):
+            out[i] = {
+                "id": r.get("id"),
+                "chapter": r.get("chapter"),
+                "position": r.get("position"),
+                "score": r.get("score"),
+                "preview": (r.get("preview") or "")[:max_len],
+            }
+        else:
+            out[i] = {
+                "id": r.id,
+                "chapter": r.chapter,
+                "position": r.position,
+                "score": r.score,
+                "preview": (r.preview or "")[:max_len],
+            }
     return out
 
+# Persistent O_APPEND fd for the history file: opened on first write and
+# kept for the process lifetime, so eval loops pay one open() total instead
+# of an open/write/close triad per run. Raw os.write skips the BufferedWriter
+# layer, and POSIX O_APPEND makes each line-sized write atomic, so concurrent
+# processes can append safely without locking.
+_HIST_FD = None
+
 def append_history(record: Dict[str, Any]) -> None:
     """Append a single JSON line to runs_history.jsonl if enabled."""
+    global _HIST_FD
     if not ENABLE_HISTORY:
         return
-    _ensure_dir(RUNS_DIR)
-    with open(HISTORY_PATH, "a", encoding="utf-8") as f:
-        f.write(json.dumps(record, ensure_ascii=False) + "\n")
+    try:
+        if _HIST_FD is None:
+            _ensure_dir(RUNS_DIR)
+            _HIST_FD = os.open(HISTORY_PATH, os.O_WRONLY | os.O_APPEND | os.O_CREAT, 0o644)
+            atexit.register(os.close, _HIST_FD)
+        if orjson is not None:
+            buf = orjson.dumps(record) + b"\n"
+        else:
+            buf = (json.dumps(record, ensure_ascii=False) + "\n").encode("utf-8")
+        # os.write retries EINTR itself (PEP 475); loop covers short writes.
+        while buf:
+            buf = buf[os.write(_HIST_FD, buf):]
+    except OSError:
+        # Never fail the main flow because of history
+        _HIST_FD = None
 
 def log_phase4_run(
     model_name: str,
@@ -59,7 +103,7 @@ def log_phase4_run(
     """
     _ensure_dir(RUNS_DIR)
     payload: Dict[str, Any] = {
-        "ts_unix": time.time(),
+        "ts_unix_ns": time.time_ns(),
         "model": model_name,
         "question_preview": (question or "")[:200],
         "context_chars": len(context_text or ""),
@@ -70,9 +114,19 @@ def log_phase4_run(
     if extra:
         payload["extra"] = extra
 
-    # Write last run (pretty JSON)
-    with open(LAST_RUN_FILE, "w", encoding="utf-8") as f:
-        json.dump(payload, f, ensure_ascii=False, indent=2)
+    # Write last run; orjson's C encoder is much faster than the stdlib on
+    # the Cyrillic-heavy payloads this logger typically sees. Compact output
+    # unless logging.pretty is set — the file is machine-generated.
+    if orjson is not None:
+        opt = orjson.OPT_INDENT_2 if PRETTY_LAST_RUN else 0
+        with open(LAST_RUN_FILE, "wb") as f:
+            f.write(orjson.dumps(payload, option=opt))
+    else:
+        with open(LAST_RUN_FILE, "w", encoding="utf-8") as f:
+            if PRETTY_LAST_RUN:
+                json.dump(payload, f, ensure_ascii=False, indent=2)
+            else:
+                f.write(json.dumps(payload, ensure_ascii=False, separators=(",", ":")))
 
     # Append to history (one-line JSON)
     try:
@@ -5,6 +5,8 @@
 #   python -m llm_integration.test_generate
 
 
+from dataclasses import asdict
+
 from llm_integration.answer_generator import generate_answer
 from llm_integration.retriever_bridge import retrieve_context
 from llm_integration.llm_router import get_llm
@@ -13,16 +15,16 @@ from llm_integration.run_logger import log_phase4_run
 # 1) Question to test
 question = "Как мне начать вести личный бюджет?"
 
-# 2) Retrieve context + developer refs
-context_text, refs = retrieve_context(question, k=5)
-
-# 3) Generate answer using current LLM (whatever is set in model.config.json / env)
-result = generate_answer(context_text, question)
-
-# 4) Resolve model name for logging (from the same router)
+# 2) Resolve the LLM once (whatever is set in model.config.json / env)
 llm = get_llm()
 model_name = getattr(llm, "model", "unknown-model")
 
+# 3) Retrieve context + developer refs
+context_text, refs = retrieve_context(question, k=5)
+
+# 4) Generate answer, reusing the same LLM instance
+result = generate_answer(context_text, question, llm=llm)
+
 # 5) Log Phase 4 run (writes artifacts/v4/runs/last_run_phase4.json)
 log_phase4_run(
     model_name=model_name,
@@ -38,6 +40,6 @@ print(result["final_output"])
 
 print("\n=== Developer Output ===")
 print({
-    "refs": refs,
+    "refs": [asdict(r) for r in refs],
     "llm_debug": result["developer_output"]
 })